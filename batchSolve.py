@@ -0,0 +1,192 @@
+import json
+import multiprocessing
+import os
+import sys
+import time
+from parserFile import splitCommandLine, parseIntOption, data
+from searchBudget import Budget
+from startState import parse, solve
+
+"""
+    Batch solver
+    Solves many input files in one run: every (input file, weight vector) pair is a job, and the jobs are handed out
+    one at a time to a pool of worker processes. A worker imports the solver once and then parses and solves job
+    after job (every parse has a ProblemInstance of its own, see dataClasses.py), so only the first job of a worker
+    pays for interpreter startup and imports. The results (Eval and schedule) and the parse/solve time of every job
+    are gathered into one JSON file, and a summary with the throughput in instances per minute is printed.
+
+    Usage: batchSolve.py INPUTS [--weights W] [--workers N] [--time-limit SECONDS] [--output FILE]
+        INPUTS: a directory (every *.txt file in it is solved) or a manifest file with one job per line:
+            "path" or "path w1 w2 w3 w4 w5 w6 w7 w8" (paths relative to the manifest, # starts a comment)
+        --weights: weight vectors used for the inputs without weights of their own, comma separated and several
+            vectors separated by ";" (Ex. "1,1,1,1,1,1,1,1;1,2,3,1,2,3,1,2"), every input is solved once per vector
+        --workers: worker processes (the number of CPUs by default)
+        --time-limit: time budget of every job in seconds, 0 to search every job to optimality (the default)
+        --output: JSON file the results are written to
+"""
+
+DEFAULT_WEIGHTS = "1,1,1,1,1,1,1,1"
+INPUT_SUFFIX = ".txt"
+
+def parseWeightVectors(text):
+    """
+    Returns the weight vectors of a --weights option
+
+    Parameters:
+        text (str): vectors of 8 comma separated integers, separated by ";"
+    Raises:
+        data.InvalidInputError: if some vector does not have 8 integers
+    """
+    vectors = []
+    for vector in text.split(";"):
+        weights = [weight.strip() for weight in vector.split(",")]
+        if len(weights) != 8 or not all(weight.isdigit() for weight in weights):
+            raise data.InvalidInputError(f"Weight vector \"{vector}\" should be 8 comma separated integers")
+        vectors.append([int(weight) for weight in weights])
+    return vectors
+
+def collectJobs(inputs, weightVectors):
+    """
+    Returns the (path, weights) jobs of a directory or a manifest file
+
+    Parameters:
+        inputs (str): directory of input files or manifest file
+        weightVectors (list): weight vectors of the inputs without weights of their own
+    Raises:
+        data.InvalidInputError: if inputs does not exist or a manifest line is not valid
+    """
+    if os.path.isdir(inputs):
+        paths = sorted(os.path.join(inputs, name) for name in os.listdir(inputs) if name.endswith(INPUT_SUFFIX))
+        return [(path, weights) for path in paths for weights in weightVectors]
+    if not os.path.isfile(inputs):
+        raise data.InvalidInputError(f"{inputs} is neither a directory nor a manifest file")
+
+    jobs = []
+    base = os.path.dirname(inputs)
+    with open(inputs) as manifest:
+        for lineNum, line in enumerate(manifest, start=1):
+            words = line.split("#", 1)[0].split()
+            if not words:
+                continue
+            path = os.path.join(base, words[0])
+            if len(words) == 1:
+                jobs += [(path, weights) for weights in weightVectors]
+            elif len(words) == 9 and all(word.isdigit() for word in words[1:]):
+                jobs.append((path, [int(word) for word in words[1:]]))
+            else:
+                raise data.InvalidInputError(f"Manifest line {lineNum} should be a path, optionally followed by 8 integer weights")
+    return jobs
+
+def solveJob(job):
+    """
+    Parses and solves one job in a worker process
+
+    Parameters:
+        job (tuple): (path, weights, time limit in seconds)
+    Returns:
+        dict: the job, its status ("solved", "infeasible", "invalid" or "error"), Eval, schedule
+        (identifier -> "DAY, TIME"), whether the budget ran out and the parse/solve seconds
+    """
+    path, weights, timeLimit = job
+    result = {"input": path, "weights": weights, "status": "solved", "eval": None, "schedule": None,
+              "exhausted": False, "parseSeconds": 0.0, "solveSeconds": 0.0, "worker": os.getpid()}
+    try:
+        start = time.perf_counter()
+        problem = parse(path, weights)
+        parsed = time.perf_counter()
+        budget = Budget(timeLimit)
+        solution = solve(problem, budget)
+        result["parseSeconds"], result["solveSeconds"] = parsed - start, time.perf_counter() - parsed
+    except data.InfeasibleProblemError as e:
+        result.update(status="infeasible", message=str(e))
+        return result
+    except data.InvalidInputError as e:
+        result.update(status="invalid", message=str(e))
+        return result
+    except Exception as e: # a broken input must not take the whole batch down
+        result.update(status="error", message=f"{type(e).__name__}: {e}")
+        return result
+
+    result["exhausted"] = budget.exhausted
+    if solution is None:
+        result["status"] = "infeasible"
+    else:
+        result["eval"] = solution.eval
+        result["schedule"] = {
+            identifier: f"{slotId.split('-')[0].upper()}, {slotId.split('-')[1]}"
+            for slots in (solution.sched.gameSlots, solution.sched.pracSlots)
+            for slotId, identifiers in slots.items() for identifier in identifiers
+        }
+    return result
+
+def batchSolve(jobs, workers, timeLimit=0, onResult=None):
+    """
+    Solves every job on a pool of worker processes
+
+    Parameters:
+        jobs (list): (path, weights) of every job
+        workers (int): number of worker processes
+        timeLimit (int): time budget of every job in seconds, 0 for none
+        onResult (function): optional, called with the result of every job as soon as it is done
+    Returns:
+        dict: the results in job order and the summary (jobs, wall seconds, instances per minute, ...)
+    """
+    start = time.perf_counter()
+    results = [None] * len(jobs)
+    tasks = [(path, weights, timeLimit) for path, weights in jobs]
+    with multiprocessing.Pool(max(1, min(workers, len(jobs)))) as pool:
+        for index, result in pool.imap_unordered(indexed, enumerate(tasks), chunksize=1):
+            results[index] = result
+            if onResult:
+                onResult(result)
+    wall = time.perf_counter() - start
+
+    statuses = {}
+    for result in results:
+        statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+    jobSeconds = [result["parseSeconds"] + result["solveSeconds"] for result in results]
+    summary = {
+        "jobs": len(jobs),
+        "workers": workers,
+        "wallSeconds": wall,
+        "instancesPerMinute": len(jobs) / wall * 60 if wall else 0.0,
+        "meanJobSeconds": sum(jobSeconds) / len(jobSeconds) if jobSeconds else 0.0,
+        "maxJobSeconds": max(jobSeconds, default=0.0),
+        "statuses": statuses,
+    }
+    return {"summary": summary, "results": results}
+
+def indexed(task):
+    """Runs solveJob on an (index, job) pair, returns (index, result) so results can be put back in job order"""
+    index, job = task
+    return index, solveJob(job)
+
+def printResult(result):
+    """Prints the one line timing summary of a finished job"""
+    weights = ",".join(str(weight) for weight in result["weights"])
+    outcome = result["eval"] if result["status"] == "solved" else result["status"]
+    if "message" in result:
+        outcome = f"{outcome} ({result['message']})"
+    print(f"{result['input']} [{weights}]: {outcome} (parse {result['parseSeconds'] * 1000:.1f}ms, "
+          f"solve {result['solveSeconds'] * 1000:.1f}ms{', budget exhausted' if result['exhausted'] else ''})")
+    sys.stdout.flush()
+
+if __name__ == "__main__":
+    positional, options = splitCommandLine(sys.argv)
+    try:
+        if len(positional) != 2: raise data.InvalidInputError("Usage: batchSolve.py INPUTS [--weights W] [--workers N] [--time-limit SECONDS] [--output FILE]")
+        jobs = collectJobs(positional[1], parseWeightVectors(options.get("weights") or DEFAULT_WEIGHTS))
+    except data.InvalidInputError as e:
+        print(f"Caught Invalid Input Error: {e}")
+        sys.exit()
+
+    batch = batchSolve(jobs, parseIntOption(options, "workers", os.cpu_count() or 1),
+                       parseIntOption(options, "time-limit", 0), printResult)
+    summary = batch["summary"]
+    print(f"{summary['jobs']} jobs on {summary['workers']} workers in {summary['wallSeconds']:.2f}s: "
+          f"{summary['instancesPerMinute']:.1f} instances/minute, mean job {summary['meanJobSeconds'] * 1000:.1f}ms, "
+          f"slowest {summary['maxJobSeconds'] * 1000:.1f}ms, {summary['statuses']}")
+
+    if options.get("output"):
+        with open(options["output"], "w") as file:
+            json.dump(batch, file, indent=2)
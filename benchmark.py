@@ -0,0 +1,204 @@
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from compiledProblem import compileProblem
+from hardConstraints import HardConstraintEngine
+from instanceGenerator import GAME_DAYS, PRACTICE_DAYS, TIMES, generate
+from parserFile import parseFile, setWeights, splitCommandLine, parseIntOption, parseFloatOption, data
+from searchBudget import Budget
+from softConstraints import DeltaEvaluator, Weights
+from startState import initialState
+from structurev2 import treeSearch
+
+"""
+    Scaling benchmark
+    Generates an input per size of a sweep (see instanceGenerator.py) and times every phase on it:
+        parse: parserFile.parseFile on the generated file
+        compile: compileProblem on the parsed objects
+        startState: startState.initialState on the compiled problem
+        hc: HardConstraintEngine.check on random (item, slot) pairs of a half assigned schedule
+        sc: DeltaEvaluator.delta and boundAfter on the same pairs
+        search: structurev2.treeSearch with a time limit
+    Every size runs in a fresh process, so the memory and caches left behind by one size do not skew the next. Every
+    phase is repeated and the fastest run is kept. A phase is recorded as its seconds and the number of operations
+    it did (checks, nodes, ...), results are written as JSON. Given a baseline JSON written by an earlier
+    run, every phase whose time per operation grew by more than the tolerance is reported as a regression and the
+    benchmark exits with status 1.
+
+    Usage: benchmark.py [--sizes 20,40,80,160] [--seed N] [--repeat N] [--search-seconds N] [--output FILE]
+                        [--baseline FILE] [--tolerance PERCENT]
+"""
+
+DEFAULT_SIZES = "20,40,80,160"
+WEIGHTS = [1] * 8 # weights and penalties of the search
+CALLS = 20000 # HC/SC calls timed per run
+NOISE_FLOOR = 1e-3 # phases faster than this (seconds) are never reported as regressions
+
+def sizeParameters(size, seed):
+    """
+    Returns the instanceGenerator.generate parameters of one size of the sweep
+
+    Parameters:
+        size (int): number of games (and of practices)
+        seed (int): seed of the generated input
+    """
+    return {
+        "games": size,
+        "practices": size,
+        "gameSlots": min(len(GAME_DAYS) * len(TIMES), max(4, size // 4)),
+        "practiceSlots": min(len(PRACTICE_DAYS) * len(TIMES), max(6, size // 3)),
+        "incompatDensity": 0.02,
+        "pairDensity": 0.005,
+        "seed": seed,
+    }
+
+def timed(function, repeat):
+    """Returns (fastest seconds, result of the last call) of calling function repeat times"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+def halfAssigned(model, weights, rand):
+    """
+    Returns an engine and an evaluator holding a random schedule of about half the items, every assignment checked
+
+    Parameters:
+        model (CompiledProblem): the problem being scheduled
+        weights (Weights): weights and penalties
+        rand (random.Random): random source
+    """
+    engine = HardConstraintEngine(model)
+    evaluator = DeltaEvaluator(model, weights)
+    for item in rand.sample(range(model.numItems), model.numItems // 2):
+        slots = [slot for slot in range(model.numSlotsFor(item)) if engine.check(item, slot)]
+        if slots:
+            slot = rand.choice(slots)
+            engine.assign(item, slot)
+            evaluator.assign(item, slot)
+    return engine, evaluator
+
+def runSize(parameters, repeat, searchSeconds):
+    """
+    Generates one input and times every phase on it, meant to run in a process of its own
+
+    Parameters:
+        parameters (dict): instanceGenerator.generate parameters
+        repeat (int): runs of every phase, the fastest is kept
+        searchSeconds (int): time limit of the search phase
+    Returns:
+        dict: the parameters, the input's line count and {"seconds", "ops"} of every phase
+    """
+    text = generate(**parameters)
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as file:
+        file.write(text)
+    try:
+        parseSeconds, instance = timed(lambda: parseFile(file.name), repeat)
+    finally:
+        os.unlink(file.name)
+    setWeights(WEIGHTS, instance)
+    weights = Weights.fromWeightsAndPenalties(instance.weights)
+    compileSeconds, model = timed(lambda: compileProblem(instance), repeat)
+    startSeconds, prob = timed(lambda: initialState(model, weights), repeat)
+    phases = {
+        "parse": {"seconds": parseSeconds, "ops": 1},
+        "compile": {"seconds": compileSeconds, "ops": 1},
+        "startState": {"seconds": startSeconds, "ops": 1},
+    }
+
+    # HC and SC calls on a half assigned schedule, unassigned items only (the engine and evaluator expect those)
+    rand = random.Random(parameters["seed"])
+    engine, evaluator = halfAssigned(model, weights, rand)
+    unassigned = [item for item in range(model.numItems) if not engine.isAssigned(item)] or [0]
+    calls = [(item, rand.randrange(model.numSlotsFor(item))) for item in rand.choices(unassigned, k=CALLS)]
+    check, delta, boundAfter = engine.check, evaluator.delta, evaluator.boundAfter
+    phases["hc"] = {"seconds": timed(lambda: [check(item, slot) for item, slot in calls], repeat)[0], "ops": CALLS}
+    phases["sc"] = {"seconds": timed(lambda: [delta(item, slot) + boundAfter(item, slot) for item, slot in calls], repeat)[0],
+                    "ops": 2 * CALLS}
+
+    # Full search, timed once: its time is bounded by the time limit, its node rate is what gets compared
+    budget = Budget(searchSeconds)
+    searchSeconds, solution = timed(lambda: treeSearch(prob, budget), 1)
+    phases["search"] = {"seconds": searchSeconds, "ops": max(1, budget.nodes)}
+
+    return {
+        "parameters": parameters,
+        "lines": text.count("\n") + 1,
+        "phases": phases,
+        "eval": solution.eval if solution else None,
+        "exhausted": budget.exhausted,
+    }
+
+def regressions(results, baseline, tolerance):
+    """
+    Returns a message for every phase of a size that is slower per operation than in the baseline
+
+    Parameters:
+        results (dict): benchmark results
+        baseline (dict): results of an earlier run
+        tolerance (float): allowed slowdown in percent
+    """
+    previous = {run["parameters"]["games"]: run for run in baseline["sizes"]}
+    messages = []
+    for run in results["sizes"]:
+        old = previous.get(run["parameters"]["games"])
+        if old is None or old["parameters"] != run["parameters"]:
+            continue
+        for phase, now in run["phases"].items():
+            before = old["phases"].get(phase)
+            if before is None or max(now["seconds"], before["seconds"]) < NOISE_FLOOR:
+                continue
+            nowRate, beforeRate = now["seconds"] / now["ops"], before["seconds"] / before["ops"]
+            if nowRate > beforeRate * (1 + tolerance / 100):
+                messages.append(f"size {run['parameters']['games']} {phase}: {nowRate * 1e6:.2f}us per op, "
+                                f"baseline {beforeRate * 1e6:.2f}us ({(nowRate / beforeRate - 1) * 100:+.0f}%)")
+    return messages
+
+def printResults(results):
+    """Prints the results as a table, one row per size"""
+    phases = ("parse", "compile", "startState", "hc", "sc", "search")
+    print(f"{'size':>6} {'lines':>7} " + " ".join(f"{phase:>11}" for phase in phases) + f" {'nodes':>9} {'eval':>8}")
+    for run in results["sizes"]:
+        times = " ".join(f"{run['phases'][phase]['seconds'] * 1000:9.2f}ms" for phase in phases)
+        print(f"{run['parameters']['games']:>6} {run['lines']:>7} {times} {run['phases']['search']['ops']:>9} {str(run['eval']):>8}")
+
+if __name__ == "__main__":
+    _, options = splitCommandLine(sys.argv)
+    try:
+        sizes = [int(size) for size in (options.get("sizes") or DEFAULT_SIZES).split(",")]
+    except ValueError:
+        print(f"Caught Invalid Input Error: {data.InvalidInputError('Command line option --sizes should be a comma separated list of integers')}")
+        sys.exit()
+    seed = parseIntOption(options, "seed", 0)
+    repeat = max(1, parseIntOption(options, "repeat", 3))
+    searchSeconds = max(1, parseIntOption(options, "search-seconds", 2))
+    tolerance = parseFloatOption(options, "tolerance", 25)
+
+    # One fresh spawned process per size, so every size is timed on a clean heap without the memory, caches and
+    # warmed up objects of the sizes before it
+    context = multiprocessing.get_context("spawn")
+    results = {"python": sys.version.split()[0], "sizes": []}
+    for size in sizes:
+        with context.Pool(1) as pool:
+            results["sizes"].append(pool.apply(runSize, (sizeParameters(size, seed), repeat, searchSeconds)))
+    printResults(results)
+
+    if options.get("output"):
+        with open(options["output"], "w") as file:
+            json.dump(results, file, indent=2)
+
+    if options.get("baseline"):
+        with open(options["baseline"]) as file:
+            messages = regressions(results, json.load(file), tolerance)
+        for message in messages:
+            print(f"Regression: {message}")
+        if messages:
+            sys.exit(1)
+        print(f"No regressions against {options['baseline']} (tolerance {tolerance:g}%)")
@@ -0,0 +1,249 @@
+from array import array
+
+"""
+    Compile stage that turns the parsed Game/Practice/slot objects into a dense integer-indexed model
+    Every game, practice and slot gets a small integer id so HC, SC, div and ftrans can work on ints and arrays
+    instead of identifier strings and object lists
+"""
+
+# When a slot takes place, by the day it is listed under: (days it meets on, length in minutes)
+# Game slots listed under FR (the parser takes them) meet on FR alone for 1h, like the FR meeting of an MO game slot
+GAME_MEETINGS = {"MO": (("MO", "WE", "FR"), 60), "TU": (("TU", "TH"), 90), "FR": (("FR",), 60)}
+PRACTICE_MEETINGS = {"MO": (("MO", "WE"), 60), "TU": (("TU", "TH"), 60), "FR": (("FR",), 120)}
+
+class CompiledProblem:
+    """
+    Dense integer-indexed representation of a parsed problem
+
+    Items are numbered games first (0 .. numGames-1) and then practices (numGames .. numItems-1).
+    Game slots and practice slots are numbered separately; a slot id stored for an item always refers to the
+    slots of the item's own kind (game slots for games, practice slots for practices).
+
+    Attributes:
+        itemIds (list[str]): identifier string of every item, indexed by item id
+        gameSlotIds (list[str]): id string ("mo-8:00") of every game slot, indexed by game slot id
+        pracSlotIds (list[str]): id string ("mo-8:00") of every practice slot, indexed by practice slot id
+        itemIndex (dict[str, int]): identifier -> item id
+        gameSlotIndex (dict[str, int]): game slot id string -> game slot id
+        pracSlotIndex (dict[str, int]): practice slot id string -> practice slot id
+        gameMax, gameMin (array): gamemax/gamemin of every game slot
+        pracMax, pracMin (array): practicemax/practicemin of every practice slot
+        incompat (list[tuple[int]]): incompatibility adjacency, incompat[i] holds every item not compatible with i
+        incompatMask (list[int]): incompat as bitmasks over item ids, bit j of incompatMask[i] is set when j is in incompat[i]
+        unwanted (list[bytearray]): item x slot mask, unwanted[i][s] is 1 when slot s is unwanted for item i
+        pref (list[array]): item x slot preference value matrix
+        prefTotal (array): sum of all preference values of every item
+        pairs (list[tuple[int, int]]): every pair (a, b) with a < b
+        pairsOf (list[tuple[int]]): pair partners of every item
+        partial (array): partial assignment slot of every item, -1 if the item has none
+        ageTier (array): age/tier group id of every game, -1 for practices
+        division (array): division of every item, -1 if the item has none
+        gameOverlaps (list[tuple[int]]): practice slots that overlap each game slot
+        pracOverlaps (list[tuple[int]]): game slots that overlap each practice slot
+    """
+    def __init__(self, itemIds, numGames, gameSlotIds, pracSlotIds, allocate=True):
+        self.itemIds = itemIds
+        self.numGames = numGames
+        self.numItems = len(itemIds)
+        self.gameSlotIds = gameSlotIds
+        self.pracSlotIds = pracSlotIds
+        self.itemIndex = {identifier: i for i, identifier in enumerate(itemIds)}
+        self.gameSlotIndex = {slotId: s for s, slotId in enumerate(gameSlotIds)}
+        self.pracSlotIndex = {slotId: s for s, slotId in enumerate(pracSlotIds)}
+        if allocate:
+            self.allocateTables()
+
+    def allocateTables(self):
+        """Allocates every table filled with its empty value"""
+        numGameSlots, numPracSlots = len(self.gameSlotIds), len(self.pracSlotIds)
+        self.gameMax = array('i', [0] * numGameSlots)
+        self.gameMin = array('i', [0] * numGameSlots)
+        self.pracMax = array('i', [0] * numPracSlots)
+        self.pracMin = array('i', [0] * numPracSlots)
+
+        self.incompat = [()] * self.numItems
+        self.incompatMask = [0] * self.numItems
+        self.unwanted = [bytearray(self.numSlotsFor(i)) for i in range(self.numItems)]
+        self.pref = [array('i', bytes(4 * self.numSlotsFor(i))) for i in range(self.numItems)]
+        self.prefTotal = array('i', [0] * self.numItems)
+        self.pairs = []
+        self.pairsOf = [()] * self.numItems
+        self.partial = array('i', [-1] * self.numItems)
+        self.ageTier = array('i', [-1] * self.numItems)
+        self.division = array('i', [-1] * self.numItems)
+        self.gameOverlaps = [()] * numGameSlots
+        self.pracOverlaps = [()] * numPracSlots
+
+    def __repr__(self):
+        return (f"CompiledProblem(games={self.numGames}, practices={self.numItems - self.numGames}, "
+                f"gameSlots={len(self.gameSlotIds)}, pracSlots={len(self.pracSlotIds)})")
+
+    def __getstate__(self):
+        """Copies memory-mapped tables (see problemCache.loadProblem) into arrays so the problem can be pickled"""
+        state = dict(self.__dict__)
+        for name, value in state.items():
+            if isinstance(value, memoryview):
+                state[name] = array(value.format, value)
+            elif isinstance(value, list) and value and isinstance(value[0], memoryview):
+                state[name] = [array(row.format, row) for row in value]
+        return state
+
+    def buildMasks(self):
+        """Fills incompatMask from incompat"""
+        masks = []
+        for neighbours in self.incompat:
+            mask = 0
+            for other in neighbours:
+                mask |= 1 << other
+            masks.append(mask)
+        self.incompatMask = masks
+
+    def isGame(self, item):
+        """Returns True if the item id belongs to a game, False if it belongs to a practice"""
+        return item < self.numGames
+
+    def numSlotsFor(self, item):
+        """Returns the number of slots of the item's kind"""
+        return len(self.gameSlotIds) if item < self.numGames else len(self.pracSlotIds)
+
+    def slotIdsFor(self, item):
+        """Returns the list of slot id strings of the item's kind"""
+        return self.gameSlotIds if item < self.numGames else self.pracSlotIds
+
+    def slotIndexFor(self, item):
+        """Returns the slot id string -> slot id dict of the item's kind"""
+        return self.gameSlotIndex if item < self.numGames else self.pracSlotIndex
+
+    def slotMaxFor(self, item):
+        """Returns the slot max vector of the item's kind"""
+        return self.gameMax if item < self.numGames else self.pracMax
+
+    def slotMinFor(self, item):
+        """Returns the slot min vector of the item's kind"""
+        return self.gameMin if item < self.numGames else self.pracMin
+
+    def conflictSlots(self, item, slot, other):
+        """
+        Returns the slots of other's kind that are at the same time as item placed in slot
+
+        Parameters:
+            item (int): the item that is placed
+            slot (int): the slot item is placed in
+            other (int): the item whose slots are being checked against item
+        """
+        itemIsGame, otherIsGame = item < self.numGames, other < self.numGames
+        if itemIsGame == otherIsGame:
+            return (slot,)
+        return self.gameOverlaps[slot] if itemIsGame else self.pracOverlaps[slot]
+
+    def together(self, a, slotA, b, slotB):
+        """
+        Returns True if item a placed in slotA is at the same time as item b placed in slotB
+
+        Parameters:
+            a (int): first item
+            slotA (int): slot of the first item
+            b (int): second item
+            slotB (int): slot of the second item
+        """
+        return slotB in self.conflictSlots(a, slotA, b)
+
+def compileProblem(instance):
+    """Builds a CompiledProblem out of the registries of a ProblemInstance filled by the parser
+
+    Parameters:
+        instance (data.ProblemInstance): the parsed problem
+    """
+    games = instance.games.getGames()
+    practices = instance.practices.getPractices()
+    gameSlots = list(instance.gameSlots.getGameSlots())
+    pracSlots = list(instance.practiceSlots.getPracticeSlots())
+
+    model = CompiledProblem(
+        [g.getIdentifier() for g in games] + [p.getIdentifier() for p in practices],
+        len(games),
+        [slot.id for slot in gameSlots],
+        [slot.getId() for slot in pracSlots],
+    )
+
+    # Slot min/max vectors
+    for s, slot in enumerate(gameSlots):
+        model.gameMax[s], model.gameMin[s] = int(slot.getGameMax()), int(slot.getGameMin())
+    for s, slot in enumerate(pracSlots):
+        model.pracMax[s], model.pracMin[s] = int(slot.getPracticeMax()), int(slot.getPracticeMin())
+
+    model.gameOverlaps, model.pracOverlaps = slotOverlaps(
+        [(slot.getDay(), slot.getStartTime()) for slot in gameSlots],
+        [(slot.getDay(), slot.getStartTime()) for slot in pracSlots],
+    )
+
+    ageTiers = {}
+    for i, element in enumerate(games + practices):
+        slotIndex = model.slotIndexFor(i)
+
+        # Incompatibilities and pairs may be listed more than once; keep every neighbour once
+        model.incompat[i] = tuple(sorted({model.itemIndex[other.getIdentifier()] for other in element.getIncompatibility()}))
+        model.pairsOf[i] = tuple(sorted({model.itemIndex[other.getIdentifier()] for other in element.getPairs()}))
+
+        for slot in element.getUnwantedSlots():
+            model.unwanted[i][slotIndex[slot.id]] = 1
+        for slot, preferenceValue in element.getPreferenceSlots():
+            model.pref[i][slotIndex[slot.id]] += int(preferenceValue)
+        model.prefTotal[i] = sum(model.pref[i])
+
+        partialSlot = element.getPartialAssignmentSlot()
+        if partialSlot:
+            model.partial[i] = slotIndex[partialSlot.id]
+
+        if element.getDivision() is not None:
+            model.division[i] = element.getDivision()
+        if model.isGame(i):
+            model.ageTier[i] = ageTiers.setdefault(element.getAgeGroup(), len(ageTiers))
+
+    model.pairs = [(a, b) for a in range(model.numItems) for b in model.pairsOf[a] if a < b]
+    model.buildMasks()
+    return model
+
+def minutes(time):
+    """Returns the minutes since midnight of a "H:MM"/"HH:MM" start time"""
+    hours, mins = time.split(":")
+    return int(hours) * 60 + int(mins)
+
+def meetings(day, startTime, table):
+    """
+    Returns the (day, start minute, end minute) intervals a slot takes place in
+
+    Parameters:
+        day (str): day the slot is listed under ("MO", "TU", "FR")
+        startTime (str): start time of the slot (Ex. "8:00")
+        table (dict): GAME_MEETINGS or PRACTICE_MEETINGS
+    """
+    days, length = table[day.upper()]
+    start = minutes(startTime)
+    return [(meetingDay, start, start + length) for meetingDay in days]
+
+def slotOverlaps(gameSlots, pracSlots):
+    """
+    Returns (gameOverlaps, pracOverlaps): the practice slots every game slot intersects in time and back
+    Game slots meet MO/WE/FR for 1h, TU/TH for 1.5h or FR alone for 1h, practice slots MO/WE or TU/TH for 1h or FR
+    for 2h, so a game and a practice slot overlap when any of their meetings share a day and intersect
+
+    Parameters:
+        gameSlots (list[tuple[str, str]]): (day, start time) of every game slot
+        pracSlots (list[tuple[str, str]]): (day, start time) of every practice slot
+    """
+    # Practice meetings by day, so every game meeting is only compared with the meetings of its own day
+    byDay = {}
+    for t, (day, startTime) in enumerate(pracSlots):
+        for meetingDay, start, end in meetings(day, startTime, PRACTICE_MEETINGS):
+            byDay.setdefault(meetingDay, []).append((start, end, t))
+
+    gameOverlaps, pracOverlaps = [], [[] for _ in pracSlots]
+    for s, (day, startTime) in enumerate(gameSlots):
+        overlapping = set()
+        for meetingDay, start, end in meetings(day, startTime, GAME_MEETINGS):
+            overlapping.update(t for otherStart, otherEnd, t in byDay.get(meetingDay, ()) if start < otherEnd and otherStart < end)
+        gameOverlaps.append(tuple(sorted(overlapping)))
+        for t in gameOverlaps[-1]:
+            pracOverlaps[t].append(s)
+    return gameOverlaps, [tuple(overlaps) for overlaps in pracOverlaps]
@@ -1,6 +1,9 @@
 from dataclasses import dataclass, field
 from typing import Dict
-from parserFile import data
+from compiledProblem import CompiledProblem
+from hardConstraints import HardConstraintEngine
+from presolve import PresolveReport
+from softConstraints import Weights
 
 """
     This file only contains necessary constants and data structures for problem representation
@@ -14,22 +17,67 @@ from parserFile import data
     practSlots: dict with 
                     key as a date-time string of practiceSlots
                     value as list of practices that have been scheduled then
+    engine: hard constraint engine tracking the same assignments by item/slot id
 """
 
 @dataclass
 class Schedule:
     gameSlots: Dict[str, list[str]] = field(default_factory=dict)
     pracSlots: Dict[str, list[str]] = field(default_factory=dict)
+    engine: HardConstraintEngine = field(default=None, repr=False, compare=False)
 
 
 """
     Problem class to represent a problem
     sched: A schedule
-    remGame: list of remaining games
-    remPrac: list of remaining practices
+    remGame: list of remaining games (item ids into model)
+    remPrac: list of remaining practices (item ids into model)
+    model: dense integer-indexed form of the problem (see compiledProblem.py)
+    eval: Eval of the schedule, set on solutions returned by the search
+    weights: weights and penalties the search scores schedules with
+    presolve: what presolve fixed and pruned in the start state (see presolve.py), None for solutions
 """
 @dataclass
 class Problem:
     sched: Schedule 
-    remGames: list[data.Game] 
-    remPracs: list[data.Practice] 
\ No newline at end of file
+    remGames: list[int]
+    remPracs: list[int]
+    model: CompiledProblem = None
+    eval: int = None
+    weights: Weights = field(default_factory=Weights, repr=False)
+    presolve: PresolveReport = field(default=None, repr=False, compare=False)
+
+
+"""
+    Leaf class to represent a node of the search tree
+    A leaf only stores the assignment that created it and a pointer to its parent, so creating a child costs O(1)
+    memory no matter how big the problem is; the full schedule of a leaf is the chain of assignments up to the root
+    (the start state) and is only built for solutions
+    parent: parent leaf, None for the root
+    item: item id that was assigned to create the leaf, -1 for the root
+    slot: slot id the item was assigned to, -1 for the root
+    depth: number of assignments between the root and the leaf
+    eval: Eval (or bound) of the leaf used to order the search
+"""
+class Leaf:
+    __slots__ = ("parent", "item", "slot", "depth", "eval")
+
+    def __init__(self, parent, item, slot, eval):
+        self.parent = parent
+        self.item = item
+        self.slot = slot
+        self.depth = parent.depth + 1 if parent else 0
+        self.eval = eval
+
+    def __repr__(self):
+        return f"Leaf(item={self.item}, slot={self.slot}, depth={self.depth}, eval={self.eval})"
+
+    def assignments(self):
+        """Returns the (item, slot) assignments from the root to this leaf"""
+        chain = []
+        leaf = self
+        while leaf.parent is not None:
+            chain.append((leaf.item, leaf.slot))
+            leaf = leaf.parent
+        chain.reverse()
+        return chain
@@ -1,6 +1,8 @@
 import sys
 import re
 
+EMPTY = () # constraint list of every game/practice without constraints of that kind, replaced by a list on the first add
+
 class GameSlot:
     """
     Class to represent a game slot in the schedule
@@ -12,10 +14,12 @@ class GameSlot:
         gameMax (int): maximum number of games that can be scheduled into this slot
         gameMin (int): minimum number of games that can be scheduled into this slot
     """
+    __slots__ = ("id", "day", "startTime", "gameMax", "gameMin")
+
     def __init__(self, day, startTime, gameMax, gameMin):
-        self.id = self.genId(day, startTime)
-        self.day = day
-        self.startTime = startTime
+        self.id = sys.intern(self.genId(day, startTime))
+        self.day = sys.intern(day)
+        self.startTime = sys.intern(startTime)
         self.gameMax = gameMax
         self.gameMin = gameMin
 
@@ -55,10 +59,12 @@ class PracticeSlot:
         practiceMax (int): maximum number of practice that can be scheduled into this slot
         practiceMin (int): minimum number of practice that can be scheduled into this slot
     """
+    __slots__ = ("id", "day", "startTime", "practiceMax", "practiceMin")
+
     def __init__(self, day, startTime, practiceMax, practiceMin):
-        self.id = self.genId(day, startTime)
-        self.day = day
-        self.startTime = startTime
+        self.id = sys.intern(self.genId(day, startTime))
+        self.day = sys.intern(day)
+        self.startTime = sys.intern(startTime)
         self.practiceMax = practiceMax
         self.practiceMin = practiceMin
 
@@ -98,17 +104,20 @@ class Game:
     Attributes:
         identifier (str): the label for the game (Ex. "CMSA U13T3 DIV 01")
     """
+    __slots__ = ("identifier", "incompatibilities", "unwantedSlots", "preferenceSlots", "pairs", "partialAssignSlot",
+                 "organization", "ageGroup", "division")
+
     def __init__(self, identifier):
-        self.identifier = identifier
-        self.incompatibilities = []
-        self.unwantedSlots = []
-        self.preferenceSlots = []
-        self.pairs = []
+        self.identifier = sys.intern(identifier)
+        self.incompatibilities = EMPTY
+        self.unwantedSlots = EMPTY
+        self.preferenceSlots = EMPTY
+        self.pairs = EMPTY
         self.partialAssignSlot = None
 
         words = str(self.identifier).split()
-        self.organization = words[0]
-        self.ageGroup = words[1]
+        self.organization = sys.intern(words[0])
+        self.ageGroup = sys.intern(words[1])
         self.division = int(words[3])
     
     def __str__(self):
@@ -133,6 +142,8 @@ class Game:
         Parameters
             element (Game/Practice): the game/practice that is not compatible with the game
         """
+        if self.incompatibilities is EMPTY:
+            self.incompatibilities = []
         self.incompatibilities.append(element)
     
     def getIncompatibility(self):
@@ -146,6 +157,8 @@ class Game:
         Parameters
             gameSlot (GameSlot): the game slot that the game does not want
         """
+        if self.unwantedSlots is EMPTY:
+            self.unwantedSlots = []
         self.unwantedSlots.append(gameSlot)
     
     def getUnwantedSlots(self):
@@ -160,6 +173,8 @@ class Game:
             gameSlot (GameSlot): the game slot that the game has a preference for
             preferenceValue (int): the preference value of the slot the game wants
         """
+        if self.preferenceSlots is EMPTY:
+            self.preferenceSlots = []
         self.preferenceSlots.append((gameSlot, preferenceValue))
     
     def getPreferenceSlots(self):
@@ -173,6 +188,8 @@ class Game:
         Parameters
             element (Game/Practice): the game/practice that is to be paired with the game
         """
+        if self.pairs is EMPTY:
+            self.pairs = []
         self.pairs.append(element)
     
     def getPairs(self):
@@ -211,17 +228,20 @@ class Practice:
     Attributes:
         identifier (str): the label for the practice (Ex. "CMSA U13T3 DIV 01 PRC 01")
     """
+    __slots__ = ("identifier", "incompatibilities", "unwantedSlots", "preferenceSlots", "pairs", "partialAssignSlot",
+                 "organization", "ageGroup", "division", "practiceNum")
+
     def __init__(self, identifier):
-        self.identifier = identifier
-        self.incompatibilities = []
-        self.unwantedSlots = []
-        self.preferenceSlots = []
-        self.pairs = []
+        self.identifier = sys.intern(identifier)
+        self.incompatibilities = EMPTY
+        self.unwantedSlots = EMPTY
+        self.preferenceSlots = EMPTY
+        self.pairs = EMPTY
         self.partialAssignSlot = None
 
         words = self.identifier.split()
-        self.organization = words[0]
-        self.ageGroup = words[1]
+        self.organization = sys.intern(words[0])
+        self.ageGroup = sys.intern(words[1])
          # Check for division and practice
         if "DIV" in words:
             self.division = int(words[words.index("DIV") + 1])
@@ -258,6 +278,8 @@ class Practice:
         Parameters
             element (Game/Practice): the game/practice that is not compatible with the practice
         """
+        if self.incompatibilities is EMPTY:
+            self.incompatibilities = []
         self.incompatibilities.append(element)
     
     def getIncompatibility(self):
@@ -271,6 +293,8 @@ class Practice:
         Parameters
             practiceSlot (PracticeSlot): the practice slot that the practice does not want
         """
+        if self.unwantedSlots is EMPTY:
+            self.unwantedSlots = []
         self.unwantedSlots.append(practiceSlot)
     
     def getUnwantedSlots(self):
@@ -285,6 +309,8 @@ class Practice:
             practiceSlot (PracticeSlot): the practice slot that the practice has a preference for
             preferenceValue (int): the preference value of the slot the practice wants
         """
+        if self.preferenceSlots is EMPTY:
+            self.preferenceSlots = []
         self.preferenceSlots.append((practiceSlot, preferenceValue))
     
     def getPreferenceSlots(self):
@@ -298,6 +324,8 @@ class Practice:
         Parameters
             element (Game/Practice): the game/practice that is to be paired with the practice
         """
+        if self.pairs is EMPTY:
+            self.pairs = []
         self.pairs.append(element)
     
     def getPairs(self):
@@ -335,258 +363,296 @@ class Practice:
 
 class GameSlots:
     """
-    Static Class to represent the list of all game slots available in the schedule
+    Class to represent the list of all game slots available in the schedule of a problem instance
     """
-    gameSlotsDict = {}
+    def __init__(self):
+        self.gameSlotsDict = {}
 
-    @staticmethod
-    def addGameSlot(gameSlot: 'GameSlot'):
+    def addGameSlot(self, gameSlot: 'GameSlot'):
         """Adds a game slot to the current list of game slots
         
         Parameters:
             gameSlot (GameSlot): The game slot object to be added to the list of game slots
         """
-        GameSlots.gameSlotsDict[gameSlot.id] = gameSlot
+        self.gameSlotsDict[gameSlot.id] = gameSlot
 
-    @staticmethod
-    def removeGameSlot(gameSlot):
+    def removeGameSlot(self, gameSlot):
         """Remove a game slot from the current list of game slots
         
         Parameters:
             gameSlot (Game Slot): The game slot object to be removed from the list of game slots
         """
-        del GameSlots.gameSlotsDict[gameSlot.id]
+        del self.gameSlotsDict[gameSlot.id]
 
-    @staticmethod
-    def getGameSlots():
+    def getGameSlots(self):
         """Returns a copy of the list of game slots available in the schedule"""
-        return GameSlots.gameSlotsDict.values()
+        return self.gameSlotsDict.values()
     
-    @staticmethod
-    def getGameSlotByDayAndTime(day, startTime):
+    def getGameSlotByDayAndTime(self, day, startTime):
         """Returns a game slot in the list of current game slots if it is in the list, None otherwise
         
         Parameters:
             day (str): The day of the game slot you want to retrieve
             startTime (str): The start time of the game slot you want to retrieve
         """
-        return GameSlots.gameSlotsDict.get(day.lower() + "-" + startTime)
+        return self.gameSlotsDict.get(day.lower() + "-" + startTime)
 
 class PracticeSlots:
     """
-    Static Class to represent the list of all practice slots available in the schedule
+    Class to represent the list of all practice slots available in the schedule of a problem instance
     """
-    practiceSlotsDict = {}
+    def __init__(self):
+        self.practiceSlotsDict = {}
 
-    @staticmethod
-    def addPracticeSlot(practiceSlot: 'PracticeSlot'):
+    def addPracticeSlot(self, practiceSlot: 'PracticeSlot'):
         """Adds a practice slot to the current list of practice slots
         
         Parameters:
             practiceSlot (PracticeSlot): The practice slot object to be added to the list of practice slots
         """
-        PracticeSlots.practiceSlotsDict[practiceSlot.id] = practiceSlot
+        self.practiceSlotsDict[practiceSlot.id] = practiceSlot
 
-    @staticmethod
-    def removePracticeSlot(practiceSlot):
+    def removePracticeSlot(self, practiceSlot):
         """Remove a practice slot from the current list of practice slots
         
         Parameters:
             practiceSlot (Practice Slot): The practice slot object to be removed from the list of practice slots
         """
-        del PracticeSlots.practiceSlotsDict[practiceSlot.id]
+        del self.practiceSlotsDict[practiceSlot.id]
 
-    @staticmethod
-    def getPracticeSlots():
+    def getPracticeSlots(self):
         """Returns a copy of the list of practice slots available in the schedule"""
-        return PracticeSlots.practiceSlotsDict.values()
+        return self.practiceSlotsDict.values()
     
-    @staticmethod
-    def getPracticeSlotByDayAndTime(day, startTime):
+    def getPracticeSlotByDayAndTime(self, day, startTime):
         """Returns a practice slot in the list of current practice slots if it is in the list, None otherwise
         
         Parameters:
             day (str): The day of the practice slot you want to retrieve
             startTime (str): The start time of the practice slot you want to retrieve
         """
-        return PracticeSlots.practiceSlotsDict.get(day.lower() + "-" + startTime)
+        return self.practiceSlotsDict.get(day.lower() + "-" + startTime)
 
 class Games:
     """
-    Static Class to represent the list of all games that need to be scheduled
+    Class to represent the list of all games of a problem instance that need to be scheduled
+
+    Games are kept in an identifier -> game dict so lookups are O(1), plus a team index
+    (organization, ageGroup) -> division -> [games] used to join games with practices of the same team
     """
-    games = []
+    def __init__(self):
+        self.games = {}
+        self.teamIndex = {}
 
-    @staticmethod
-    def addGame(game):
+    def addGame(self, game):
         """Adds a game to the current list of games
         
         Parameters:
             game (Game): The game object to be added to the list of games
         """
-        Games.games.append(game)
+        if game.getIdentifier() in self.games:
+            self.removeGame(game)
+        self.games[game.getIdentifier()] = game
+        divisions = self.teamIndex.setdefault((game.getOrganization(), game.getAgeGroup()), {})
+        divisions.setdefault(game.getDivision(), []).append(game)
 
-    @staticmethod
-    def removeGame(game):
+    def removeGame(self, game):
         """Remove a game from the current list of games
         
         Parameters:
             game (Game): The game object to be removed from the list of games
         """
-        Games.games = [g for g in Games.games if g != game]
+        oldGame = self.games.pop(game.getIdentifier(), None)
+        if oldGame is None:
+            return
+        divisions = self.teamIndex[(oldGame.getOrganization(), oldGame.getAgeGroup())]
+        bucket = divisions[oldGame.getDivision()]
+        bucket.remove(oldGame)
+        if not bucket:
+            del divisions[oldGame.getDivision()]
 
-    @staticmethod
-    def getGames() -> list[Game]:
+    def getGames(self) -> list[Game]:
         """Returns a copy of the list of games that needs to be scheduled"""
-        return list(Games.games)
+        return list(self.games.values())
     
-    @staticmethod
-    def getGameByIdentifier(identifier):
+    def getGameByIdentifier(self, identifier):
         """Returns a game in the list of current games if it is in the list, None otherwise
         
         Parameters:
             identifier (str): The identifier of the game you want to retrieve from the list of current games
         """
-        for game in Games.games:
-            if game.getIdentifier() == identifier:
-                return game
-        return None
+        return self.games.get(identifier)
+
+    def getGamesByTeam(self, organization, ageGroup, division=None):
+        """Returns a list of the games of a team, all divisions of the team if division is None
+        
+        Parameters:
+            organization (str): The organization of the games (Ex. "CMSA")
+            ageGroup (str): The age group of the games (Ex. "U13T3")
+            division (int): The division of the games, None for every division
+        """
+        divisions = self.teamIndex.get((organization, ageGroup), {})
+        if division is None:
+            return [game for bucket in divisions.values() for game in bucket]
+        return list(divisions.get(division, []))
     
 class Practices:
     """
-    Static Class to represent the list of all practices that need to be scheduled
+    Class to represent the list of all practices of a problem instance that need to be scheduled
+
+    Practices are kept in an identifier -> practice dict so lookups are O(1), plus a team index
+    (organization, ageGroup) -> division -> [practices]; practices without a division are stored under None
     """
-    practices = []
+    def __init__(self):
+        self.practices = {}
+        self.teamIndex = {}
 
-    @staticmethod
-    def addPractice(practice):
+    def addPractice(self, practice):
         """Adds a practice to the current list of practices
         
         Parameters:
             practice (Practice): The practice object to be added to the list of practices
         """
-        Practices.practices.append(practice)
+        if practice.getIdentifier() in self.practices:
+            self.removePractice(practice)
+        self.practices[practice.getIdentifier()] = practice
+        divisions = self.teamIndex.setdefault((practice.getOrganization(), practice.getAgeGroup()), {})
+        divisions.setdefault(practice.getDivision(), []).append(practice)
 
-    @staticmethod
-    def removePractice(practice):
+    def removePractice(self, practice):
         """Remove a practice from the current list of practices
         
         Parameters:
             practice (Practice): The practice object to be removed from the list of practices
         """
-        Practices.practices = [p for p in Practices.practices if p != practice]
+        oldPractice = self.practices.pop(practice.getIdentifier(), None)
+        if oldPractice is None:
+            return
+        divisions = self.teamIndex[(oldPractice.getOrganization(), oldPractice.getAgeGroup())]
+        bucket = divisions[oldPractice.getDivision()]
+        bucket.remove(oldPractice)
+        if not bucket:
+            del divisions[oldPractice.getDivision()]
 
-    @staticmethod
-    def getPractices():
+    def getPractices(self):
         """Returns a copy of the list of practices that needs to be scheduled"""
-        return list(Practices.practices)
+        return list(self.practices.values())
     
-    @staticmethod
-    def getPracticeByIdentifier(identifier):
+    def getPracticeByIdentifier(self, identifier):
         """Returns a practice in the list of current practices if it is in the list, None otherwise
         
         Parameters:
             identifier (str): The identifier of the practice you want to retrieve from the list of current practices
         """
-        for practice in Practices.practices:
-            if practice.getIdentifier() == identifier:
-                return practice
-        return None
+        return self.practices.get(identifier)
+
+    def getPracticeTeams(self):
+        """Returns a view of the practice team index, (organization, ageGroup) -> division -> [practices]"""
+        return self.teamIndex.items()
     
 class WeightsAndPenalties:
     """
-    Static Class to hold all weights and penalties needed for the search
+    Class to hold all weights and penalties of a problem instance needed for the search
     """
-    minFilledWeight = None
-    prefWeight = None
-    pairWeight = None
-    secDiffWeight = None
-    gameMinPen = None
-    practiceMinPen = None
-    notPairedPen = None
-    sectionPen = None
-
-    @staticmethod
-    def getMinFilledWeight():
+    def __init__(self):
+        self.minFilledWeight = None
+        self.prefWeight = None
+        self.pairWeight = None
+        self.secDiffWeight = None
+        self.gameMinPen = None
+        self.practiceMinPen = None
+        self.notPairedPen = None
+        self.sectionPen = None
+
+    def getMinFilledWeight(self):
         """Returns the minimum filled weight"""
-        return WeightsAndPenalties.minFilledWeight
+        return self.minFilledWeight
     
-    @staticmethod
-    def setMinFilledWeight(minFilledWeight):
+    def setMinFilledWeight(self, minFilledWeight):
         """sets the value of the minimum filled weight"""
-        WeightsAndPenalties.minFilledWeight = minFilledWeight
+        self.minFilledWeight = minFilledWeight
 
-    @staticmethod
-    def getPrefWeight():
+    def getPrefWeight(self):
         """Returns the preference weight"""
-        return WeightsAndPenalties.prefWeight
+        return self.prefWeight
     
-    @staticmethod
-    def setPrefWeight(prefWeight):
+    def setPrefWeight(self, prefWeight):
         """sets the value of the preference weight"""
-        WeightsAndPenalties.prefWeight = prefWeight
+        self.prefWeight = prefWeight
 
-    @staticmethod
-    def getPairWeight():
+    def getPairWeight(self):
         """Returns the pair weight"""
-        return WeightsAndPenalties.pairWeight
+        return self.pairWeight
     
-    @staticmethod
-    def setPairWeight(pairWeight):
+    def setPairWeight(self, pairWeight):
         """sets the value of the pair weight"""
-        WeightsAndPenalties.pairWeight = pairWeight
+        self.pairWeight = pairWeight
 
-    @staticmethod
-    def getSecDiffWeight():
+    def getSecDiffWeight(self):
         """Returns the section difference weight"""
-        return WeightsAndPenalties.secDiffWeight
+        return self.secDiffWeight
     
-    @staticmethod
-    def setSecDiffWeight(secDiffWeight):
+    def setSecDiffWeight(self, secDiffWeight):
         """sets the value of the section difference weight"""
-        WeightsAndPenalties.secDiffWeight = secDiffWeight
+        self.secDiffWeight = secDiffWeight
     
-    @staticmethod
-    def getGameMinPen():
+    def getGameMinPen(self):
         """Returns the game minimum penalty"""
-        return WeightsAndPenalties.gameMinPen
+        return self.gameMinPen
     
-    @staticmethod
-    def setGameMinPen(gameMinPen):
+    def setGameMinPen(self, gameMinPen):
         """sets the value of the game minimum penalty"""
-        WeightsAndPenalties.gameMinPen = gameMinPen
+        self.gameMinPen = gameMinPen
     
-    @staticmethod
-    def getPracticeMinPen():
+    def getPracticeMinPen(self):
         """Returns the practice minimum penalty"""
-        return WeightsAndPenalties.practiceMinPen
+        return self.practiceMinPen
     
-    @staticmethod
-    def setPracticeMinPen(practiceMinPen):
+    def setPracticeMinPen(self, practiceMinPen):
         """sets the value of the practice minimum penalty"""
-        WeightsAndPenalties.practiceMinPen = practiceMinPen
+        self.practiceMinPen = practiceMinPen
 
-    @staticmethod
-    def getNotPairedPen():
+    def getNotPairedPen(self):
         """Returns the not paired penalty"""
-        return WeightsAndPenalties.notPairedPen
+        return self.notPairedPen
     
-    @staticmethod
-    def setNotPairedPen(notPairedPen):
+    def setNotPairedPen(self, notPairedPen):
         """sets the value of the not paired penalty"""
-        WeightsAndPenalties.notPairedPen = notPairedPen
+        self.notPairedPen = notPairedPen
 
-    @staticmethod
-    def getSectionPen():
+    def getSectionPen(self):
         """Returns the section penalty"""
-        return WeightsAndPenalties.sectionPen
+        return self.sectionPen
     
-    @staticmethod
-    def setSectionPen(sectionPen):
+    def setSectionPen(self, sectionPen):
         """sets the value of the section penalty"""
-        WeightsAndPenalties.sectionPen = sectionPen
+        self.sectionPen = sectionPen
+
+class ProblemInstance:
+    """
+    Class to hold everything the parser reads for one problem: its slots, games, practices and weights
+    Every instance owns its own registries, so any number of problems can be parsed and solved in one process
+
+    Attributes:
+        gameSlots (GameSlots): the game slots of the problem
+        practiceSlots (PracticeSlots): the practice slots of the problem
+        games (Games): the games of the problem
+        practices (Practices): the practices of the problem
+        weights (WeightsAndPenalties): the weights and penalties of the search
+    """
+    def __init__(self):
+        self.gameSlots = GameSlots()
+        self.practiceSlots = PracticeSlots()
+        self.games = Games()
+        self.practices = Practices()
+        self.weights = WeightsAndPenalties()
 
 class InvalidInputError(Exception):
     def __init__(self, message):
         super().__init__(message)
 
+
+class InfeasibleProblemError(InvalidInputError):
+    """Raised when no schedule can satisfy the hard constraints (Ex. a partial assignment to an unwanted slot)"""
+    def __init__(self, message):
+        super().__init__(message)
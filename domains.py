@@ -0,0 +1,128 @@
+from hardConstraints import INCOMPATIBLE, MAX
+
+"""
+    Live domains for the depth first search
+    Every unassigned game/practice keeps the set of slots it can still legally take. After an assignment, forward
+    checking removes the slots the new assignment rules out for the item's incompatible neighbours (which include the
+    games/practices of the same division) and, when the slot becomes full, for every other item of the same kind.
+    Unassigned items sit in a bucket queue keyed by domain size. Each bucket is a bitmask over the items' positions in
+    the ftrans order (preference, then pairs), so picking the most constrained item, ties broken by that order, is a
+    lowest-set-bit lookup rather than a scan over the remaining items. Every change is recorded on a trail so
+    backtracking restores the domains exactly.
+"""
+
+UNQUEUED = -1 # trail marker: the item was taken out of the bucket queue because it was assigned
+
+class Domains:
+    """
+    Attributes:
+        model (CompiledProblem): the problem being scheduled
+        engine (HardConstraintEngine): engine holding the current assignments
+        domain (list[set]): slots each item can still take (None for items assigned before the search)
+        order (list[int]): the tracked items in ftrans order
+        bit (dict[int, int]): 1 << (position of the item in order)
+        buckets (list[int]): bitmask of the unassigned items whose domain has k slots, for every k
+        queued (bytearray): 1 while the item is unassigned and in the bucket queue
+        trail (list[tuple]): (item, slot) domain removals and (item, UNQUEUED) assignments, in order
+    """
+    def __init__(self, engine, order):
+        """
+        Parameters:
+            engine (HardConstraintEngine): engine holding the start state's assignments
+            order (list[int]): the unassigned items to track, in ftrans order
+        """
+        model = engine.model
+        self.model = model
+        self.engine = engine
+        self.order = list(order)
+        self.bit = {item: 1 << position for position, item in enumerate(self.order)}
+        self.domain = [None] * model.numItems
+        self.buckets = [0] * (max(len(model.gameSlotIds), len(model.pracSlotIds)) + 1)
+        self.queued = bytearray(model.numItems)
+        self.trail = []
+        for item in self.order:
+            self.domain[item] = {slot for slot in range(model.numSlotsFor(item)) if engine.check(item, slot)}
+            self.buckets[len(self.domain[item])] |= self.bit[item]
+            self.queued[item] = 1
+
+    def empty(self):
+        """Returns True if some unassigned item has no legal slot left"""
+        return bool(self.buckets[0])
+
+    def pick(self):
+        """Returns the unassigned item with the smallest domain (first in ftrans order on ties), None if every item is assigned"""
+        for bucket in self.buckets:
+            if bucket:
+                return self.order[(bucket & -bucket).bit_length() - 1]
+        return None
+
+    def mark(self):
+        """Returns a trail position that undoTo can restore"""
+        return len(self.trail)
+
+    def remove(self, item, slot, reason=None):
+        """
+        Removes slot from the domain of the queued item, returns False if the domain is now empty
+
+        Parameters:
+            item (int): item id whose domain shrinks
+            slot (int): slot id to remove
+            reason (str): hard constraint that rules the slot out (counted by searchStats.CountingDomains)
+        """
+        domain = self.domain[item]
+        size = len(domain)
+        domain.remove(slot)
+        self.buckets[size] ^= self.bit[item]
+        self.buckets[size - 1] |= self.bit[item]
+        self.trail.append((item, slot))
+        return size > 1
+
+    def assign(self, item, slot):
+        """
+        Takes item out of the queue and forward checks its assignment to slot (already made in the engine)
+
+        Parameters:
+            item (int): item id that was assigned
+            slot (int): slot id it was assigned to
+        Returns:
+            False as soon as some neighbour's domain empties, True otherwise
+        """
+        model, domain, queued = self.model, self.domain, self.queued
+        self.buckets[len(domain[item])] ^= self.bit[item]
+        queued[item] = 0
+        self.trail.append((item, UNQUEUED))
+
+        # Slots the incompatible neighbours can no longer use
+        for other in model.incompat[item]:
+            if queued[other]:
+                for otherSlot in model.conflictSlots(item, slot, other):
+                    if otherSlot in domain[other] and not self.remove(other, otherSlot, INCOMPATIBLE):
+                        return False
+
+        # A full slot is gone from the domain of every other item of the same kind
+        if self.engine.countsFor(item)[slot] >= model.slotMaxFor(item)[slot]:
+            isGame = item < model.numGames
+            for other in self.order:
+                if queued[other] and (other < model.numGames) == isGame and slot in domain[other]:
+                    if not self.remove(other, slot, MAX):
+                        return False
+        return True
+
+    def undoTo(self, mark):
+        """
+        Restores the domains and the queue to a trail position returned by mark
+
+        Parameters:
+            mark (int): trail position to restore
+        """
+        domain, buckets, trail = self.domain, self.buckets, self.trail
+        while len(trail) > mark:
+            item, slot = trail.pop()
+            size = len(domain[item])
+            if slot == UNQUEUED:
+                buckets[size] |= self.bit[item]
+                self.queued[item] = 1
+            else:
+                domain[item].add(slot)
+                buckets[size] ^= self.bit[item]
+                buckets[size + 1] |= self.bit[item]
@@ -0,0 +1,286 @@
+import random
+from localSearch import assignmentOf, materializeAssignment
+from hardConstraints import HardConstraintEngine
+from searchBudget import Budget
+from softConstraints import evalAssignment
+from structurev2 import treeSearch
+
+np = None # numpy, imported by the first GeneticSearch (False if it is not installed), see importNumpy
+
+"""
+    Genetic (set-based) search over a population of complete schedules
+    A generation picks parents by tournament, makes children by uniform crossover and mutation and repairs every
+    child so it satisfies the hard constraints again. The population is kept as an individual x item matrix of slot
+    ids and the fitness (Eval: gpmin, pref, pair and secdiff, the same components as structurev2.SC) of the whole
+    population is computed at once with numpy array operations (see PopulationFitness). Without numpy the fitness
+    falls back to softConstraints.evalAssignment per schedule. numpy is only imported once a genetic search is
+    created, so importing this module stays cheap.
+"""
+
+POPULATION = 40
+TOURNAMENT = 3
+ELITE = 2 # best schedules copied unchanged into the next generation
+MUTATION_RATE = 0.05 # chance of every movable item of a child to get a random slot
+SEED_ATTEMPTS = 20 # random schedules tried per seat of the first population before the tree search is used
+
+def importNumpy():
+    """Imports numpy the first time it is called, returns it (False if numpy is not installed)"""
+    global np
+    if np is None:
+        try:
+            import numpy
+            np = numpy
+        except ImportError: # numpy is optional, without it the population is scored one schedule at a time
+            np = False
+    return np
+
+class PopulationFitness:
+    """
+    Eval of every row of an individual x item slot matrix, computed with numpy
+
+    Attributes:
+        model (CompiledProblem): the problem being scheduled
+        weights (Weights): weights and penalties
+        gamePen, pracPen (ndarray): game x game slot / practice x practice slot unmet preference penalty
+        overlap (ndarray): game slot x practice slot, True where the two slots are at the same time
+        sameKindPairs (tuple[ndarray, ndarray]): items of the pairs whose two items are of the same kind
+        mixedPairs (tuple[ndarray, ndarray]): game and practice of the pairs of a game and a practice
+        tierKey (ndarray): age/tier group of every game
+        tierDivKey (ndarray): (age/tier group, division) combination id of every game
+    """
+    def __init__(self, model, weights):
+        self.model = model
+        self.weights = weights
+        numGames = model.numGames
+        numGameSlots, numPracSlots = len(model.gameSlotIds), len(model.pracSlotIds)
+
+        prefTotal = np.asarray(model.prefTotal, dtype=np.int64)
+        pref = np.zeros((model.numItems, max(numGameSlots, numPracSlots)), dtype=np.int64)
+        for item in range(model.numItems):
+            pref[item, :len(model.pref[item])] = model.pref[item]
+        self.gamePen = prefTotal[:numGames, None] - pref[:numGames, :numGameSlots]
+        self.pracPen = prefTotal[numGames:, None] - pref[numGames:, :numPracSlots]
+
+        self.overlap = np.zeros((numGameSlots, numPracSlots), dtype=bool)
+        for slot, overlaps in enumerate(model.gameOverlaps):
+            self.overlap[slot, list(overlaps)] = True
+
+        pairs = np.asarray(model.pairs, dtype=np.int64).reshape(-1, 2)
+        isGame = pairs < numGames
+        sameKind = isGame[:, 0] == isGame[:, 1]
+        self.sameKindPairs = (pairs[sameKind, 0], pairs[sameKind, 1])
+        mixed = pairs[~sameKind]
+        mixedIsGame = mixed < numGames
+        self.mixedPairs = (np.where(mixedIsGame[:, 0], mixed[:, 0], mixed[:, 1]),
+                           np.where(mixedIsGame[:, 0], mixed[:, 1], mixed[:, 0]))
+
+        tiers = np.asarray(model.ageTier[:numGames], dtype=np.int64)
+        divisions = np.asarray(model.division[:numGames], dtype=np.int64)
+        self.tierKey = tiers
+        self.tierDivKey = tiers
+        if numGames:
+            _, tierDivKey = np.unique(np.stack([tiers, divisions], axis=1), axis=0, return_inverse=True)
+            self.tierDivKey = tierDivKey.reshape(-1)
+
+    def slotCounts(self, keys, slots, numKeys, numSlots):
+        """
+        Returns an individual x (key, slot) count matrix
+
+        Parameters:
+            keys (ndarray): group of every column (item)
+            slots (ndarray): individual x item slot ids
+            numKeys (int): number of groups
+            numSlots (int): number of slots of the items' kind
+        """
+        rows = slots.shape[0]
+        width = numKeys * numSlots
+        index = (np.arange(rows)[:, None] * width + keys[None, :] * numSlots + slots).ravel()
+        return np.bincount(index, minlength=rows * width).reshape(rows, width)
+
+    def __call__(self, population):
+        """
+        Returns the Eval of every schedule of a population
+
+        Parameters:
+            population (ndarray): individual x item matrix of slot ids, every item assigned
+        """
+        model, weights = self.model, self.weights
+        numGames = model.numGames
+        numGameSlots, numPracSlots = len(model.gameSlotIds), len(model.pracSlotIds)
+        games, pracs = population[:, :numGames], population[:, numGames:]
+
+        # gpmin: games/practices every slot is short of its min
+        gameCounts = self.slotCounts(np.zeros(games.shape[1], dtype=np.int64), games, 1, numGameSlots)
+        pracCounts = self.slotCounts(np.zeros(pracs.shape[1], dtype=np.int64), pracs, 1, numPracSlots)
+        minFilled = (np.maximum(0, np.asarray(model.gameMin) - gameCounts).sum(axis=1) * weights.gameMinPen
+                     + np.maximum(0, np.asarray(model.pracMin) - pracCounts).sum(axis=1) * weights.practiceMinPen)
+
+        # pref: unmet preference values
+        pref = (np.take_along_axis(self.gamePen[None, :, :], games[:, :, None], axis=2).sum(axis=(1, 2))
+                + np.take_along_axis(self.pracPen[None, :, :], pracs[:, :, None], axis=2).sum(axis=(1, 2)))
+
+        # pair: pairs not at the same time
+        a, b = self.sameKindPairs
+        game, prac = self.mixedPairs
+        notPaired = ((population[:, a] != population[:, b]).sum(axis=1)
+                     + (~self.overlap[population[:, game], population[:, prac]]).sum(axis=1))
+
+        # secdiff: games of one age/tier and different divisions in the same slot
+        secDiff = np.zeros(population.shape[0], dtype=np.int64)
+        if numGames:
+            tierCounts = self.slotCounts(self.tierKey, games, int(self.tierKey.max()) + 1, numGameSlots)
+            divCounts = self.slotCounts(self.tierDivKey, games, int(self.tierDivKey.max()) + 1, numGameSlots)
+            secDiff = (tierCounts * (tierCounts - 1) // 2).sum(axis=1) - (divCounts * (divCounts - 1) // 2).sum(axis=1)
+
+        return (minFilled * weights.minFilled + pref * weights.pref
+                + notPaired * weights.notPairedPen * weights.pair + secDiff * weights.sectionPen * weights.secDiff)
+
+class GeneticSearch:
+    """
+    Population of complete schedules that satisfy the hard constraints
+
+    Attributes:
+        prob (Problem): initial problem state
+        model (CompiledProblem): the problem being scheduled
+        weights (Weights): weights and penalties
+        fixed (list[tuple[int, int]]): (item, slot) assignments of the start state, kept in every schedule
+        movable (list[int]): item ids the search assigns
+        random (random.Random): random source of the search
+        fitness (function): population -> Eval of every schedule
+    """
+    def __init__(self, prob, weights, seed=0):
+        self.prob = prob
+        self.model = prob.model
+        self.weights = weights
+        assignment = prob.sched.engine.assignment
+        self.fixed = [(item, slot) for item, slot in enumerate(assignment) if slot >= 0]
+        self.movable = [item for item, slot in enumerate(assignment) if slot < 0]
+        self.random = random.Random(seed)
+        self.fitness = PopulationFitness(self.model, weights) if importNumpy() else self.fitnessOneByOne
+
+    def fitnessOneByOne(self, population):
+        """Returns the Eval of every schedule of a population (list of rows), one schedule at a time"""
+        return [evalAssignment(self.model, self.weights, row) for row in population]
+
+    def repair(self, row):
+        """
+        Makes a schedule satisfy the hard constraints: the movable items are placed in random order, each keeps its
+        slot if the hard constraints allow it and takes a random allowed slot otherwise
+
+        Parameters:
+            row (list): slot of every item, changed in place (any slot id of the item's kind, or -1)
+        Returns:
+            list: row, None if some item has no allowed slot left
+        """
+        engine = HardConstraintEngine(self.model)
+        for item, slot in self.fixed:
+            engine.assign(item, slot)
+        order = list(self.movable)
+        self.random.shuffle(order)
+        for item in order:
+            slot = row[item]
+            if slot < 0 or not engine.check(item, slot):
+                allowed = [s for s in range(self.model.numSlotsFor(item)) if engine.check(item, s)]
+                if not allowed:
+                    return None
+                slot = self.random.choice(allowed)
+            engine.assign(item, slot)
+            row[item] = slot
+        return row
+
+    def mutate(self, row):
+        """Gives every movable item a random slot with probability MUTATION_RATE, changes row in place"""
+        for item in self.movable:
+            if self.random.random() < MUTATION_RATE:
+                row[item] = self.random.randrange(self.model.numSlotsFor(item))
+        return row
+
+    def crossover(self, mother, father):
+        """Returns a child taking the slot of every item from one of the two parents at random"""
+        pick = self.random.random
+        return [m if pick() < 0.5 else f for m, f in zip(mother, father)]
+
+    def firstPopulation(self):
+        """Returns POPULATION repaired random schedules, seeded from the tree search when random ones fail"""
+        population = []
+        emptyRow = [-1] * self.model.numItems
+        for item, slot in self.fixed:
+            emptyRow[item] = slot
+        for _ in range(POPULATION * SEED_ATTEMPTS):
+            row = self.repair(list(emptyRow))
+            if row:
+                population.append(row)
+                if len(population) == POPULATION:
+                    return population
+
+        # Tight problem: mutate the first feasible schedule of the tree search
+        if not population:
+            seed = treeSearch(self.prob, Budget(solutionLimit=1))
+            if seed is None:
+                return []
+            population.append(assignmentOf(seed))
+        while len(population) < POPULATION:
+            child = self.repair(self.mutate(list(self.random.choice(population))))
+            population.append(child or list(population[0]))
+        return population
+
+    def tournament(self, population, scores):
+        """Returns the best of TOURNAMENT schedules drawn at random"""
+        contenders = self.random.sample(range(len(population)), min(TOURNAMENT, len(population)))
+        return population[min(contenders, key=lambda k: scores[k])]
+
+    def run(self, budget, onImprove=None):
+        """
+        Evolves the population until the budget runs out
+
+        Parameters:
+            budget (Budget): the search stops once it is exhausted, every schedule scored is charged as a node
+            onImprove (function): optional, called with (solution, elapsed seconds) for every improved schedule
+        Returns:
+            Problem: the best schedule found, None if no schedule satisfies the hard constraints
+        """
+        population = self.firstPopulation()
+        if not population:
+            return None
+
+        best, bestEval = None, None
+        while True:
+            scores = self.score(population)
+            ranked = sorted(range(len(population)), key=lambda k: scores[k])
+            if bestEval is None or scores[ranked[0]] < bestEval:
+                best, bestEval = list(population[ranked[0]]), int(scores[ranked[0]])
+                if onImprove:
+                    onImprove(materializeAssignment(self.prob, best, bestEval), budget.elapsed())
+            if not budget.spend(len(population)):
+                break
+
+            # Elitism, then tournament selection, crossover, mutation and repair
+            children = [population[k] for k in ranked[:ELITE]]
+            while len(children) < POPULATION:
+                mother, father = self.tournament(population, scores), self.tournament(population, scores)
+                child = self.repair(self.mutate(self.crossover(mother, father)))
+                children.append(child or list(mother))
+            population = children
+
+        return materializeAssignment(self.prob, best, bestEval)
+
+    def score(self, population):
+        """Returns the Eval of every schedule of a population (list of rows)"""
+        if np:
+            return self.fitness(np.asarray(population, dtype=np.int64))
+        return self.fitness(population)
+
+def geneticSearch(prob, budget, weights=None, seed=0, onImprove=None):
+    """
+    Runs the genetic search until the budget runs out
+
+    Parameters:
+        prob (Problem): initial problem state
+        budget (Budget): the search stops once it is exhausted (needs a time or node limit)
+        weights (Weights): weights and penalties, the problem's (prob.weights) if not given
+        seed (int): seed of the random source
+        onImprove (function): optional, called with (solution, elapsed seconds) for every improved schedule
+    Returns:
+        Problem: the best schedule found, None if no schedule satisfies the hard constraints
+    """
+    return GeneticSearch(prob, weights or prob.weights, seed).run(budget, onImprove)
@@ -0,0 +1,133 @@
+from array import array
+
+"""
+    Incremental hard constraint engine
+    Keeps per-slot occupancy counters and per-slot occupancy bitmasks up to date as items are assigned and unassigned,
+    so checking whether an item may go in a slot never rescans the schedule. The bitmask of a slot holds a bit for
+    every item placed at the same time as the slot, so the not compatible check is one AND of it with the item's
+    incompatibility mask (CompiledProblem.incompatMask), and an assignment only flips the item's bit in its slot and
+    in the slots of the other kind that overlap it.
+"""
+
+# Names of the hard constraints, reported by HardConstraintEngine.violation
+MAX = "max"
+UNWANTED = "unwanted"
+PARTIAL = "partial"
+INCOMPATIBLE = "incompatible"
+
+class HardConstraintEngine:
+    """
+    Incremental checker for the hard constraints of a CompiledProblem:
+        gamemax/practicemax, not compatible, unwanted, partial assignment and games/practices of the same division
+        overlapping (the parser adds those as incompatibilities, so they are checked with not compatible)
+
+    Attributes:
+        model (CompiledProblem): the problem being scheduled
+        assignment (array): slot of every item, -1 while the item is unassigned
+        gameCount (array): number of games in every game slot
+        pracCount (array): number of practices in every practice slot
+        gameOccupied (list[int]): per game slot, bitmask over item ids of the games in it and the practices in the
+            practice slots that overlap it
+        pracOccupied (list[int]): per practice slot, bitmask over item ids of the practices in it and the games in the
+            game slots that overlap it
+    """
+    def __init__(self, model):
+        self.model = model
+        self.assignment = array('i', [-1] * model.numItems)
+        self.gameCount = array('i', [0] * len(model.gameSlotIds))
+        self.pracCount = array('i', [0] * len(model.pracSlotIds))
+        self.gameOccupied = [0] * len(model.gameSlotIds)
+        self.pracOccupied = [0] * len(model.pracSlotIds)
+
+    def countsFor(self, item):
+        """Returns the occupancy counters of the item's kind"""
+        return self.gameCount if item < self.model.numGames else self.pracCount
+
+    def occupiedFor(self, item):
+        """Returns the per-slot occupancy bitmasks of the item's kind"""
+        return self.gameOccupied if item < self.model.numGames else self.pracOccupied
+
+    def check(self, item, slot):
+        """
+        Returns True if item can be assigned to slot without breaking a hard constraint
+
+        Parameters:
+            item (int): item id of the game/practice to place
+            slot (int): slot id (of the item's kind) to place it in
+        """
+        model = self.model
+        if item < model.numGames:
+            if self.gameCount[slot] >= model.gameMax[slot] or self.gameOccupied[slot] & model.incompatMask[item]:
+                return False
+        elif self.pracCount[slot] >= model.pracMax[slot] or self.pracOccupied[slot] & model.incompatMask[item]:
+            return False
+        partial = model.partial[item]
+        return not model.unwanted[item][slot] and (partial < 0 or partial == slot)
+
+    def violation(self, item, slot):
+        """
+        Returns the name of the first hard constraint that assigning item to slot breaks, None if there is none
+
+        Parameters:
+            item (int): item id of the game/practice to place
+            slot (int): slot id (of the item's kind) to place it in
+        """
+        model = self.model
+        if self.countsFor(item)[slot] >= model.slotMaxFor(item)[slot]:
+            return MAX
+        if model.unwanted[item][slot]:
+            return UNWANTED
+        if model.partial[item] >= 0 and model.partial[item] != slot:
+            return PARTIAL
+        if self.occupiedFor(item)[slot] & model.incompatMask[item]:
+            return INCOMPATIBLE
+        return None
+
+    def assign(self, item, slot):
+        """
+        Places item in slot, setting its bit in the slot and in every overlapping slot of the other kind
+        Costs O(number of overlapping slots)
+
+        Parameters:
+            item (int): item id of the game/practice to place
+            slot (int): slot id (of the item's kind) to place it in
+        """
+        model = self.model
+        bit = 1 << item
+        self.assignment[item] = slot
+        if item < model.numGames:
+            self.gameCount[slot] += 1
+            self.gameOccupied[slot] |= bit
+            for other in model.gameOverlaps[slot]:
+                self.pracOccupied[other] |= bit
+        else:
+            self.pracCount[slot] += 1
+            self.pracOccupied[slot] |= bit
+            for other in model.pracOverlaps[slot]:
+                self.gameOccupied[other] |= bit
+
+    def unassign(self, item):
+        """
+        Removes item from its slot, undoing assign
+
+        Parameters:
+            item (int): item id of the assigned game/practice
+        """
+        model = self.model
+        bit = 1 << item
+        slot = self.assignment[item]
+        self.assignment[item] = -1
+        if item < model.numGames:
+            self.gameCount[slot] -= 1
+            self.gameOccupied[slot] ^= bit
+            for other in model.gameOverlaps[slot]:
+                self.pracOccupied[other] ^= bit
+        else:
+            self.pracCount[slot] -= 1
+            self.pracOccupied[slot] ^= bit
+            for other in model.pracOverlaps[slot]:
+                self.gameOccupied[other] ^= bit
+
+    def isAssigned(self, item):
+        """Returns True if item currently has a slot"""
+        return self.assignment[item] >= 0
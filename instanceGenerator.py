@@ -0,0 +1,142 @@
+import math
+import random
+import sys
+from parserFile import VALID_TIMES, splitCommandLine, parseIntOption, parseFloatOption, data
+
+"""
+    Synthetic input generator
+    Writes random but valid input files in the parser's format, so the parser and the search can be measured on
+    inputs of any size. Every game belongs to an (organization, age/tier, division) team, every practice to the team
+    of one of the games (an OPN practice without a division to all divisions of its organization and age/tier).
+    Slot maxima are set so the slots can hold all games/practices; whether a generated input has a schedule that
+    satisfies every hard constraint depends on the densities.
+
+    Usage: instanceGenerator.py OUTPUT_FILE [--games N] [--practices N] [--game-slots N] [--practice-slots N]
+                                           [--incompat DENSITY] [--pairs DENSITY] [--seed N]
+"""
+
+ORGANIZATIONS = ("CMSA", "CUSA", "CSSC", "CFSA")
+AGE_GROUPS = ("U12T1", "U13T1", "U13T2", "U14T1", "U15T1", "U16T1", "U17T1", "U19T1", "O18")
+GAME_DAYS = ("MO", "TU")
+PRACTICE_DAYS = ("MO", "TU", "FR")
+# Half hour start times in order (VALID_TIMES also holds the zero padded spellings)
+TIMES = sorted((time for time in VALID_TIMES if not time.startswith("0")), key=lambda time: [int(part) for part in time.split(":")])
+
+def generate(games=20, practices=20, gameSlots=6, practiceSlots=8, incompatDensity=0.01, pairDensity=0.005, seed=0,
+             unwantedRate=0.1, preferenceRate=0.5):
+    """
+    Returns the text of a random input file
+
+    Parameters:
+        games (int): number of games
+        practices (int): number of practices
+        gameSlots (int): number of game slots (at most len(GAME_DAYS) * len(TIMES))
+        practiceSlots (int): number of practice slots (at most len(PRACTICE_DAYS) * len(TIMES))
+        incompatDensity (float): chance of every two games/practices to be not compatible
+        pairDensity (float): chance of every two games/practices to be a pair
+        seed (int): seed of the random source
+        unwantedRate (float): unwanted slots per game/practice
+        preferenceRate (float): preferences per game/practice
+    """
+    rand = random.Random(seed)
+    if gameSlots > len(GAME_DAYS) * len(TIMES) or practiceSlots > len(PRACTICE_DAYS) * len(TIMES):
+        raise data.InvalidInputError("Too many slots requested, every slot needs its own day and start time")
+
+    gameSlotList = rand.sample([(day, time) for day in GAME_DAYS for time in TIMES], gameSlots)
+    pracSlotList = rand.sample([(day, time) for day in PRACTICE_DAYS for time in TIMES], practiceSlots)
+
+    # Teams: enough divisions per organization and age/tier for every game to get its own team
+    divisions = max(1, math.ceil(games / (len(ORGANIZATIONS) * len(AGE_GROUPS))))
+    teams = rand.sample([(org, age, div) for org in ORGANIZATIONS for age in AGE_GROUPS for div in range(1, divisions + 1)], games)
+    gameIds = [f"{org} {age} DIV {div:02d}" for org, age, div in teams]
+
+    practiceIds, practiceCount = [], {}
+    for _ in range(practices if games else 0):
+        org, age, div = rand.choice(teams)
+        number = practiceCount[org, age, div] = practiceCount.get((org, age, div), 0) + 1
+        if rand.random() < 0.2:
+            practiceIds.append(f"{org} {age} OPN {number + 100:02d}") # OPN numbers kept apart from the PRC numbers
+        else:
+            practiceIds.append(f"{org} {age} DIV {div:02d} PRC {number:02d}")
+    practiceIds = list(dict.fromkeys(practiceIds))
+    items = gameIds + practiceIds
+
+    lines = ["Name:", f"Generated{seed}", "", "Game slots:"]
+    lines += slotLines(rand, gameSlotList, len(gameIds))
+    lines += ["", "Practice slots:"]
+    lines += slotLines(rand, pracSlotList, len(practiceIds))
+    lines += ["", "Games:"] + gameIds
+    lines += ["", "Practices:"] + practiceIds
+
+    lines += ["", "Not compatible:"]
+    lines += [f"{a}, {b}" for a, b in randomPairs(rand, items, incompatDensity)]
+
+    lines += ["", "Unwanted:"]
+    for _ in range(round(unwantedRate * len(items))):
+        item = rand.choice(items)
+        day, time = rand.choice(pracSlotList if "PRC" in item or "OPN" in item else gameSlotList)
+        lines.append(f"{item}, {day}, {time}")
+
+    lines += ["", "Preferences:"]
+    for _ in range(round(preferenceRate * len(items))):
+        item = rand.choice(items)
+        day, time = rand.choice(pracSlotList if "PRC" in item or "OPN" in item else gameSlotList)
+        lines.append(f"{day}, {time}, {item}, {rand.randint(1, 10)}")
+
+    lines += ["", "Pair:"]
+    lines += [f"{a}, {b}" for a, b in randomPairs(rand, items, pairDensity)]
+
+    lines += ["", "Partial assignments:", ""]
+    return "\n".join(lines)
+
+def slotLines(rand, slots, itemCount):
+    """
+    Returns the "DAY, TIME, MAX, MIN" lines of a list of slots, with maxima that hold itemCount items together
+
+    Parameters:
+        rand (random.Random): random source
+        slots (list): (day, time) of every slot
+        itemCount (int): number of games/practices the slots have to hold
+    """
+    if not slots:
+        return []
+    average = itemCount / len(slots)
+    lines = []
+    for day, time in slots:
+        slotMax = math.ceil(average * rand.uniform(1.2, 2.0)) + 1
+        slotMin = rand.randint(0, max(0, math.floor(average * 0.5)))
+        lines.append(f"{day}, {time}, {slotMax}, {slotMin}")
+    return lines
+
+def randomPairs(rand, items, density):
+    """
+    Returns about density * (number of item pairs) distinct random pairs of different items
+
+    Parameters:
+        rand (random.Random): random source
+        items (list): identifiers to pick from
+        density (float): share of all item pairs to return
+    """
+    count = round(density * len(items) * (len(items) - 1) / 2)
+    pairs = set()
+    while len(pairs) < count:
+        a, b = rand.sample(items, 2)
+        pairs.add((min(a, b), max(a, b)))
+    return sorted(pairs)
+
+if __name__ == "__main__":
+    positional, options = splitCommandLine(sys.argv)
+    try:
+        if len(positional) != 2: raise data.InvalidInputError("Usage: instanceGenerator.py OUTPUT_FILE [--games N] [--practices N] ...")
+        text = generate(
+            parseIntOption(options, "games", 20), parseIntOption(options, "practices", 20),
+            parseIntOption(options, "game-slots", 6), parseIntOption(options, "practice-slots", 8),
+            parseFloatOption(options, "incompat", 0.01), parseFloatOption(options, "pairs", 0.005),
+            parseIntOption(options, "seed", 0),
+        )
+    except data.InvalidInputError as e:
+        print(f"Caught Invalid Input Error: {e}")
+        sys.exit()
+
+    with open(positional[1], 'w') as file:
+        file.write(text)
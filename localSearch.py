@@ -0,0 +1,241 @@
+import math
+import random
+from hardConstraints import HardConstraintEngine
+from softConstraints import DeltaEvaluator
+from structure import materialize
+from zobrist import TranspositionTable, ZobristKeys
+
+"""
+    Local search improvement stage
+    Simulated annealing over complete schedules, seeded with a feasible schedule from the tree search. A step either
+    moves one game/practice to another slot or swaps the slots of two games/practices of the same kind. Every step is
+    checked against the hard constraints by the incremental HardConstraintEngine and scored with DeltaEvaluator, so a
+    step costs O(number of incompatibilities and pairs of the items involved), never a pass over the schedule.
+    Games/practices fixed by a partial assignment are never moved. The search stops when its Budget runs out and
+    returns the best schedule it has seen.
+    The Zobrist hash of the current schedule is kept up to date with every step, and the hashes of the last
+    TABU_SIZE schedules visited are kept in a transposition table: a step that would make the schedule worse is
+    rejected if it leads back to one of them, so the search does not cycle between the same few schedules.
+"""
+
+CHECK_INTERVAL = 256 # steps between two budget checks
+SWAP_CHANCE = 0.3 # share of the steps that try a swap instead of a move
+SAMPLE_STEPS = 200 # random steps sampled to pick the starting temperature
+COOLING = 1e-3 # final temperature / starting temperature
+TABU_SIZE = 1024 # recently visited schedules a worsening step may not return to
+
+class Annealer:
+    """
+    Complete schedule under local search
+
+    Attributes:
+        model (CompiledProblem): the problem being scheduled
+        engine (HardConstraintEngine): hard constraints of the current schedule
+        evaluator (DeltaEvaluator): Eval of the current schedule
+        movable (list[int]): item ids the search may move (the ones without a partial assignment)
+        random (random.Random): random source of the search
+        zobrist (ZobristKeys): random key of every (item, slot)
+        hash (int): Zobrist hash of the current schedule
+        visited (TranspositionTable): hash -> Eval of the recently visited schedules (tabu memory)
+    """
+    def __init__(self, model, weights, assignment, movable, seed=0):
+        """
+        Parameters:
+            model (CompiledProblem): the problem being scheduled
+            weights (Weights): weights and penalties
+            assignment (sequence): slot of every item of a schedule that satisfies the hard constraints
+            movable (list[int]): item ids the search may move
+            seed (int): seed of the random source
+        """
+        self.model = model
+        self.engine = HardConstraintEngine(model)
+        self.evaluator = DeltaEvaluator(model, weights)
+        for item, slot in enumerate(assignment):
+            self.engine.assign(item, slot)
+            self.evaluator.assign(item, slot)
+        self.movable = list(movable)
+        self.random = random.Random(seed)
+        self.zobrist = ZobristKeys(model, seed)
+        self.hash = self.zobrist.hashOf(self.engine.assignment)
+        self.visited = TranspositionTable(TABU_SIZE)
+        self.visited.store(self.hash, self.evaluator.value)
+
+    def place(self, item, slot):
+        """Assigns item to slot in the engine and the evaluator"""
+        self.engine.assign(item, slot)
+        self.evaluator.assign(item, slot)
+        self.hash ^= self.zobrist.keys[item][slot]
+
+    def lift(self, item):
+        """Unassigns item from the engine and the evaluator, returns its slot"""
+        slot = self.engine.assignment[item]
+        self.engine.unassign(item)
+        self.evaluator.unassign(item)
+        self.hash ^= self.zobrist.keys[item][slot]
+        return slot
+
+    def move(self, item, slot, temperature):
+        """
+        Moves item to slot if the hard constraints allow it and the annealing criterion accepts the Eval change
+
+        Parameters:
+            item (int): item id of the assigned game/practice
+            slot (int): slot id (of the item's kind) to move it to
+            temperature (float): current temperature
+        Returns:
+            int: the Eval change made, None if the step was rejected
+        """
+        before = self.evaluator.value
+        oldSlot = self.lift(item)
+        if self.engine.check(item, slot):
+            change = self.evaluator.value + self.evaluator.delta(item, slot) - before
+            if self.accept(change, temperature, self.hash ^ self.zobrist.keys[item][slot]):
+                self.place(item, slot)
+                self.visited.store(self.hash, before + change)
+                return change
+        self.place(item, oldSlot)
+        return None
+
+    def swap(self, a, b, temperature):
+        """
+        Swaps the slots of two items of the same kind if the hard constraints allow it and the annealing criterion
+        accepts the Eval change
+
+        Parameters:
+            a (int): item id of an assigned game/practice
+            b (int): item id of an assigned item of the same kind, in another slot
+            temperature (float): current temperature
+        Returns:
+            int: the Eval change made, None if the step was rejected
+        """
+        engine, evaluator = self.engine, self.evaluator
+        before = evaluator.value
+        slotA, slotB = self.lift(a), self.lift(b)
+        if engine.check(a, slotB):
+            self.place(a, slotB)
+            if engine.check(b, slotA):
+                change = evaluator.value + evaluator.delta(b, slotA) - before
+                if self.accept(change, temperature, self.hash ^ self.zobrist.keys[b][slotA]):
+                    self.place(b, slotA)
+                    self.visited.store(self.hash, before + change)
+                    return change
+            self.lift(a)
+        self.place(a, slotA)
+        self.place(b, slotB)
+        return None
+
+    def accept(self, change, temperature, target):
+        """
+        Metropolis criterion: always take improvements, take a worse step with probability exp(-change / T) unless
+        it leads back to a recently visited schedule
+
+        Parameters:
+            change (int): Eval change of the step
+            temperature (float): current temperature
+            target (int): Zobrist hash of the schedule the step leads to
+        """
+        if change <= 0:
+            return True
+        if target in self.visited:
+            return False
+        return temperature > 0 and self.random.random() < math.exp(-change / temperature)
+
+    def step(self, temperature):
+        """Tries one random move or swap, returns the Eval change made (None if the step was rejected)"""
+        model, rand = self.model, self.random
+        item = rand.choice(self.movable)
+        if rand.random() < SWAP_CHANCE:
+            other = rand.choice(self.movable)
+            if (other < model.numGames) != (item < model.numGames) or self.engine.assignment[other] == self.engine.assignment[item]:
+                return None
+            return self.swap(item, other, temperature)
+        slot = rand.randrange(model.numSlotsFor(item))
+        if slot == self.engine.assignment[item]:
+            return None
+        return self.move(item, slot, temperature)
+
+    def startTemperature(self):
+        """Returns the mean Eval increase of SAMPLE_STEPS random steps, every sampled step is undone"""
+        increases = []
+        for _ in range(SAMPLE_STEPS):
+            item = self.random.choice(self.movable)
+            slot = self.random.randrange(self.model.numSlotsFor(item))
+            oldSlot = self.lift(item)
+            if slot != oldSlot and self.engine.check(item, slot):
+                change = self.evaluator.delta(item, slot) - self.evaluator.delta(item, oldSlot)
+                if change > 0:
+                    increases.append(change)
+            self.place(item, oldSlot)
+        return sum(increases) / len(increases) if increases else 1.0
+
+def improve(prob, solution, budget, weights=None, seed=0, onImprove=None):
+    """
+    Runs simulated annealing from a feasible schedule until the budget runs out
+
+    Parameters:
+        prob (Problem): initial problem state the solution was found from
+        solution (Problem): schedule that satisfies the hard constraints (Ex. from structurev2.treeSearch)
+        budget (Budget): the search stops once it is exhausted (its time limit sets the cooling schedule)
+        weights (Weights): weights and penalties, the problem's (prob.weights) if not given
+        seed (int): seed of the random source
+        onImprove (function): optional, called with (solution, elapsed seconds) for every improved schedule
+    Returns:
+        Problem: the best schedule found (the given solution if nothing better was found)
+    """
+    model = prob.model
+    weights = weights or prob.weights
+    movable = [item for item in prob.remGames + prob.remPracs if model.partial[item] < 0]
+    if not movable:
+        return solution
+
+    annealer = Annealer(model, weights, assignmentOf(solution), movable, seed)
+    assignment, value = annealer.engine.assignment, annealer.evaluator.value
+    best, bestEval = list(assignment), value
+    startTemperature = annealer.startTemperature()
+    duration = budget.deadline - budget.start
+
+    temperature, steps = startTemperature, 0
+    while True:
+        change = annealer.step(temperature)
+        if change is not None:
+            value += change
+            if value < bestEval:
+                best, bestEval = list(assignment), value
+                if onImprove:
+                    onImprove(materializeAssignment(prob, best, bestEval), budget.elapsed())
+
+        steps += 1
+        if steps % CHECK_INTERVAL == 0:
+            if not budget.spend(CHECK_INTERVAL):
+                break
+            # Geometric cooling over the time budget, a budget without a time limit cools by node count instead
+            progress = budget.elapsed() / duration if duration < math.inf else budget.nodes / budget.nodeLimit
+            temperature = startTemperature * COOLING ** min(progress, 1.0)
+
+    return materializeAssignment(prob, best, bestEval)
+
+def assignmentOf(solution):
+    """
+    Returns the slot of every item of a complete schedule
+
+    Parameters:
+        solution (Problem): complete schedule, with its model
+    """
+    model = solution.model
+    assignment = [-1] * model.numItems
+    for slots, slotIndex in ((solution.sched.gameSlots, model.gameSlotIndex), (solution.sched.pracSlots, model.pracSlotIndex)):
+        for slotId, identifiers in slots.items():
+            for identifier in identifiers:
+                assignment[model.itemIndex[identifier]] = slotIndex[slotId]
+    return assignment
+
+def materializeAssignment(prob, assignment, eval):
+    """
+    Builds the full schedule of an assignment on top of the start state
+
+    Parameters:
+        prob (Problem): initial problem state
+        assignment (sequence): slot of every item
+        eval (int): Eval of the schedule
+    """
+    return materialize(prob, [(item, assignment[item]) for item in prob.remGames + prob.remPracs], eval)
@@ -0,0 +1,210 @@
+import math
+import multiprocessing
+import searchStats
+from domains import Domains
+from searchBudget import Budget
+from structure import LeafCursor, materialize
+from structurev2 import SC, depthFirst, domainFtrans, expand, treeSearch
+
+"""
+    Parallel branch and bound over a process pool
+    The AND-tree is expanded breadth first near the root (same ftrans, forward checking and bounds as
+    structurev2.treeSearch) until there are SPLIT_FACTOR open subtrees per worker. Every subtree is the prefix of
+    assignments that leads to it; the prefixes are handed out best bound first, one at a time, so a worker that
+    finishes a cheap subtree takes the next one while the others are still busy (the pool's task queue plays the role
+    of work stealing, the subtrees are never split again once handed out).
+    The best Eval found so far lives in a multiprocessing.Value shared by every worker; each worker prunes against
+    it and lowers it as soon as it finds a better schedule, so a good schedule found in one subtree cuts the others.
+    A Budget is shared the same way: the node and solution counts are summed over the workers and every worker stops at the deadline.
+    With search statistics on (searchStats.py) every worker collects its own and hands them back with each subtree's
+    result, the main process adds them up.
+"""
+
+SPLIT_FACTOR = 8 # open subtrees made at the root per worker
+NO_INCUMBENT = 2 ** 62 # shared Eval while no schedule has been found
+
+# State of a worker process, built once by initWorker and reused for every subtree it searches
+workerCursor = None
+workerDomains = None
+workerIncumbent = None
+workerProblem = None
+workerBudget = None
+workerOnImprove = None
+
+def parallelSearch(prob, workers, budget=None, onImprove=None):
+    """
+    Branch and bound split over worker processes, returns the same Eval as structurev2.treeSearch
+
+    Parameters:
+        prob (Problem): initial problem state
+        workers (int): number of worker processes, 1 runs structurev2.treeSearch in this process
+        budget (Budget): optional time/node budget, see structurev2.treeSearch
+        onImprove (function): optional, called with (solution, elapsed seconds) for every improved schedule; it is
+            called in the worker process that found the schedule, so it has to be picklable (a module level function)
+    Returns:
+        Problem: optimal solution (with its Eval), None if no schedule satisfies the hard constraints
+            With an exhausted budget: the best solution found so far, None if none was found
+    """
+    if workers <= 1:
+        return treeSearch(prob, budget, onImprove)
+
+    budget = budget or Budget()
+    if budget.limited:
+        budget.share()
+
+    weights = prob.weights
+    cursor = LeafCursor(prob, weights)
+    domains = searchStats.watch(Domains(cursor.engine, [item for item in cursor.order if item in cursor.unassigned]))
+    if not cursor.unassigned:
+        return materialize(prob, [], SC(cursor))
+    if domains.empty():
+        return None
+
+    subtrees, incumbent, incumbentEval = split(cursor, domains, workers * SPLIT_FACTOR)
+    if incumbent:
+        if onImprove:
+            onImprove(materialize(prob, incumbent, incumbentEval), budget.elapsed())
+        if not budget.found():
+            return materialize(prob, incumbent, incumbentEval)
+    shared = multiprocessing.Value('q', incumbentEval if incumbent else NO_INCUMBENT)
+
+    collectStats = searchStats.stats is not None
+    with multiprocessing.Pool(workers, initWorker, (prob, weights, shared, budget, onImprove, collectStats)) as pool:
+        for assignments, assignmentsEval, exhausted, stats in pool.imap_unordered(searchSubtree, subtrees, chunksize=1):
+            if assignments and assignmentsEval < incumbentEval:
+                incumbent, incumbentEval = assignments, assignmentsEval
+            budget.exhausted = budget.exhausted or exhausted
+            if stats:
+                searchStats.stats.merge(stats)
+
+    return materialize(prob, incumbent, incumbentEval) if incumbent else None
+
+def split(cursor, domains, target):
+    """
+    Expands the tree level by level from the cursor until it has at least target open subtrees or none are left
+
+    Parameters:
+        cursor (LeafCursor): cursor at the start state
+        domains (Domains): domains of the start state
+        target (int): number of open subtrees wanted
+    Returns:
+        (list, list, int): prefixes ((item, slot) assignments) of the open subtrees sorted by bound, and the
+        assignments and Eval of the best complete schedule met while expanding (None, inf if there is none)
+    """
+    frontier = [(SC(cursor), [])]
+    incumbent, incumbentEval = None, math.inf
+    while frontier and len(frontier) < target:
+        children = []
+        for _, prefix in frontier:
+            marks = apply(cursor, domains, prefix)
+            match = domainFtrans(domains)
+            _, slots, bounds, _ = expand(cursor, domains, match)
+            for slot, bound in zip(slots, bounds):
+                if bound >= incumbentEval:
+                    break
+                mark = domains.mark()
+                cursor.assign(match, slot)
+                if domains.assign(match, slot):
+                    if not cursor.unassigned:
+                        incumbent, incumbentEval = prefix + [(match, slot)], bound
+                    else:
+                        children.append((bound, prefix + [(match, slot)]))
+                domains.undoTo(mark)
+                cursor.unassign(match)
+            undo(cursor, domains, prefix, marks)
+        frontier = [child for child in children if child[0] < incumbentEval]
+
+    frontier.sort(key=lambda child: child[0])
+    if searchStats.stats:
+        searchStats.stats.record(maxFrontier=len(frontier))
+    return [prefix for _, prefix in frontier], incumbent, incumbentEval
+
+def apply(cursor, domains, prefix):
+    """
+    Assigns a prefix on the cursor and the domains, returns the domain trail marks needed to undo it
+
+    Parameters:
+        cursor (LeafCursor): cursor at the start state
+        domains (Domains): domains of the start state
+        prefix (list): (item, slot) assignments of a subtree, made by split so forward checking never fails on them
+    """
+    marks = []
+    for item, slot in prefix:
+        marks.append(domains.mark())
+        cursor.assign(item, slot)
+        domains.assign(item, slot)
+    return marks
+
+def undo(cursor, domains, prefix, marks):
+    """
+    Takes a prefix made by apply back off the cursor and the domains
+
+    Parameters:
+        cursor (LeafCursor): cursor holding the prefix
+        domains (Domains): domains holding the prefix
+        prefix (list): (item, slot) assignments passed to apply
+        marks (list): trail marks returned by apply
+    """
+    for (item, _), mark in zip(reversed(prefix), reversed(marks)):
+        domains.undoTo(mark)
+        cursor.unassign(item)
+
+def initWorker(prob, weights, shared, budget, onImprove, collectStats=False):
+    """
+    Builds the cursor and the domains of a worker process at the start state
+
+    Parameters:
+        prob (Problem): initial problem state
+        weights (Weights): weights and penalties of the run
+        shared (multiprocessing.Value): best Eval found by any worker
+        budget (Budget): budget of the run
+        onImprove (function): improvement callback of the run, None if there is none
+        collectStats (bool): True if the worker collects search statistics (see searchStats.py)
+    """
+    global workerCursor, workerDomains, workerIncumbent, workerProblem, workerBudget, workerOnImprove
+    # Forked workers inherit the main process' statistics, start from fresh ones (or none)
+    if collectStats:
+        searchStats.enable()
+    else:
+        searchStats.disable()
+    workerCursor = LeafCursor(prob, weights)
+    workerDomains = searchStats.watch(Domains(workerCursor.engine, [item for item in workerCursor.order if item in workerCursor.unassigned]))
+    workerIncumbent = shared
+    workerProblem = prob
+    workerBudget = budget
+    workerOnImprove = onImprove
+
+def searchSubtree(prefix):
+    """
+    Runs the depth first branch and bound below a prefix in a worker process
+
+    Parameters:
+        prefix (list): (item, slot) assignments leading to the subtree
+    Returns:
+        (list, int, bool, dict): assignments and Eval of a schedule better than the shared incumbent (None, None if
+        the subtree has none), whether the budget ran out and the search statistics collected since the last subtree
+        (None while statistics are off)
+    """
+    if workerBudget.exhausted:
+        return None, None, True, takeStats()
+
+    report = None
+    if workerOnImprove:
+        report = lambda incumbent, incumbentEval: workerOnImprove(
+            materialize(workerProblem, prefix + incumbent, incumbentEval), workerBudget.elapsed())
+
+    marks = apply(workerCursor, workerDomains, prefix)
+    incumbent, incumbentEval = depthFirst(
+        workerCursor, workerDomains, workerIncumbent.value, workerIncumbent, workerBudget, report)
+    undo(workerCursor, workerDomains, prefix, marks)
+    if not incumbent:
+        return None, None, workerBudget.exhausted, takeStats()
+    return prefix + incumbent, incumbentEval, workerBudget.exhausted, takeStats()
+
+def takeStats():
+    """Returns the worker's search statistics as a dict and starts fresh ones, None while statistics are off"""
+    if searchStats.stats is None:
+        return None
+    collected = searchStats.stats.asDict()
+    searchStats.enable()
+    return collected
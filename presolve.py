@@ -0,0 +1,94 @@
+from dataclasses import dataclass
+import dataClasses as data
+from domains import Domains
+
+"""
+    Presolve stage of the start state
+    Shrinks the problem before the search: every partial assignment is applied, then the domains of the remaining
+    games/practices are built (unwanted slots and the slots the fixed items rule out by not compatible, overlap and
+    gamemax/practicemax are left out) and every item left with a single legal slot is fixed to it. Fixing an item
+    forward checks its neighbours, which can leave more of them with a single slot, so fixing repeats until every
+    remaining item has two or more slots. Every fixed item is a level cut from the search tree, and the search starts
+    from domains that are already this small (it builds them from the same HardConstraintEngine state).
+    An item left without a legal slot means no schedule satisfies the hard constraints, reported as
+    data.InfeasibleProblemError before any search is done.
+"""
+
+@dataclass
+class PresolveReport:
+    """
+    items: number of games and practices
+    partial: items fixed by a partial assignment
+    forced: items fixed because they had a single legal slot left
+    slotsBefore: sum of the domain sizes of all items before presolve (every slot of the item's kind)
+    slotsAfter: sum of the domain sizes of the items left for the search
+    remaining: items left for the search
+    """
+    items: int = 0
+    partial: int = 0
+    forced: int = 0
+    slotsBefore: int = 0
+    slotsAfter: int = 0
+    remaining: int = 0
+
+    def __str__(self):
+        meanBefore = self.slotsBefore / self.items if self.items else 0.0
+        meanAfter = self.slotsAfter / self.remaining if self.remaining else 0.0
+        return (f"Presolve: {self.partial + self.forced} of {self.items} items fixed ({self.partial} by partial "
+                f"assignment, {self.forced} with a single legal slot), {self.remaining} left for the search, "
+                f"domain slots {self.slotsBefore} -> {self.slotsAfter} (mean {meanBefore:.1f} -> {meanAfter:.1f})")
+
+def presolve(pr):
+    """
+    Applies the partial assignments and fixes every item with a single legal slot, in the start state
+
+    Parameters:
+        pr (Problem): start state without assignments, its schedule, engine and remaining items are changed in place
+    Returns:
+        PresolveReport: how much the problem shrank
+    Raises:
+        data.InfeasibleProblemError: if a partial assignment breaks a hard constraint or some item has no legal slot
+    """
+    model, engine = pr.model, pr.sched.engine
+    report = PresolveReport(items=model.numItems, slotsBefore=sum(model.numSlotsFor(item) for item in range(model.numItems)))
+
+    # Partial assignments, in item order
+    for item in range(model.numItems):
+        slot = model.partial[item]
+        if slot >= 0:
+            reason = engine.violation(item, slot)
+            if reason is not None:
+                raise data.InfeasibleProblemError(
+                    f"Partial assignment of {model.itemIds[item]} to {slotName(model, item, slot)} breaks the {reason} hard constraint")
+            place(pr, item, slot)
+            report.partial += 1
+
+    # Domains of the other items, then fix singletons until none is left (there is no size 1 bucket without slots)
+    domains = Domains(engine, [item for item in range(model.numItems) if not engine.isAssigned(item)])
+    while not domains.empty() and len(domains.buckets) > 1 and domains.buckets[1]:
+        item = domains.pick()
+        slot = next(iter(domains.domain[item]))
+        place(pr, item, slot)
+        domains.assign(item, slot)
+        report.forced += 1
+    if domains.empty():
+        item = domains.pick()
+        raise data.InfeasibleProblemError(f"{model.itemIds[item]} has no legal slot left after presolve")
+
+    pr.remGames = [item for item in pr.remGames if not engine.isAssigned(item)]
+    pr.remPracs = [item for item in pr.remPracs if not engine.isAssigned(item)]
+    report.remaining = len(pr.remGames) + len(pr.remPracs)
+    report.slotsAfter = sum(len(domains.domain[item]) for item in pr.remGames + pr.remPracs)
+    return report
+
+def place(pr, item, slot):
+    """Assigns item to slot in the start state's engine and schedule"""
+    model = pr.model
+    pr.sched.engine.assign(item, slot)
+    slots = pr.sched.gameSlots if model.isGame(item) else pr.sched.pracSlots
+    slots[model.slotIdsFor(item)[slot]].append(model.itemIds[item])
+
+def slotName(model, item, slot):
+    """Returns the "DAY, TIME" name of a slot of the item's kind"""
+    day, time = model.slotIdsFor(item)[slot].split("-")
+    return f"{day.upper()}, {time}"
@@ -0,0 +1,166 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+from array import array
+from compiledProblem import CompiledProblem
+
+"""
+    On-disk cache of compiled problems
+    After a parse the CompiledProblem is written in a compact binary form named after the sha256 of the input file,
+    later runs on the same input memory-map that file instead of parsing. Changing the input changes its hash, so a
+    stale cache entry is never read.
+
+    File layout: MAGIC, a little endian uint32 length, a JSON table of contents and then the tables, each one
+    8-byte aligned. The table of contents maps every table name to [typecode, offset, count]; ragged tables
+    (incompat, pairsOf, unwanted, pref, overlaps) are stored as a flat table plus an offsets table.
+"""
+
+MAGIC = b"MEWTWO\x00\x02" # bump the last byte when the layout or the meaning of a table changes
+CACHE_SUFFIX = ".problem"
+
+def fileHash(fileInput):
+    """Returns the sha256 hex digest of the contents of a file
+
+    Parameters:
+        fileInput (str): path of the file to hash
+    """
+    digest = hashlib.sha256()
+    with open(fileInput, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def cachePath(cacheDir, fileInput):
+    """Returns the path of the cache entry for an input file
+
+    Parameters:
+        cacheDir (str): directory the cache entries are kept in
+        fileInput (str): path of the input file
+    """
+    return os.path.join(cacheDir, fileHash(fileInput) + CACHE_SUFFIX)
+
+def flatten(rows):
+    """Returns (offsets, values) for a list of int sequences"""
+    offsets, values = array('i', [0]), array('i')
+    for row in rows:
+        values.extend(row)
+        offsets.append(len(values))
+    return offsets, values
+
+def unflatten(offsets, values):
+    """Returns a list of zero-copy slices of values, one per row described by offsets"""
+    return [values[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+def saveProblem(model, path):
+    """Writes a compiled problem to path in the cache format
+
+    Parameters:
+        model (CompiledProblem): the problem to write
+        path (str): file to write, replaced atomically
+    """
+    strings = "\n".join(model.itemIds + model.gameSlotIds + model.pracSlotIds).encode("utf-8")
+    incompatOffsets, incompatValues = flatten(model.incompat)
+    pairsOfOffsets, pairsOfValues = flatten(model.pairsOf)
+    gameOverlapOffsets, gameOverlapValues = flatten(model.gameOverlaps)
+    pracOverlapOffsets, pracOverlapValues = flatten(model.pracOverlaps)
+    slotOffsets, prefValues = flatten(model.pref)
+    tables = {
+        "strings": array('B', strings),
+        "gameMax": model.gameMax, "gameMin": model.gameMin,
+        "pracMax": model.pracMax, "pracMin": model.pracMin,
+        "prefTotal": model.prefTotal, "partial": model.partial,
+        "ageTier": model.ageTier, "division": model.division,
+        "incompatOffsets": incompatOffsets, "incompat": incompatValues,
+        "pairsOfOffsets": pairsOfOffsets, "pairsOf": pairsOfValues,
+        "pairs": array('i', [item for pair in model.pairs for item in pair]),
+        "gameOverlapOffsets": gameOverlapOffsets, "gameOverlaps": gameOverlapValues,
+        "pracOverlapOffsets": pracOverlapOffsets, "pracOverlaps": pracOverlapValues,
+        "slotOffsets": slotOffsets, "pref": prefValues,
+        "unwanted": array('B', b"".join(model.unwanted)),
+    }
+    counts = {"numGames": model.numGames, "numItems": model.numItems,
+              "numGameSlots": len(model.gameSlotIds), "numPracSlots": len(model.pracSlotIds)}
+
+    # Lay the tables out one after the other, 8-byte aligned, after the table of contents
+    toc, offset = {}, 0
+    for name, table in tables.items():
+        toc[name] = [table.typecode, offset, len(table)]
+        offset += (len(table) * table.itemsize + 7) & ~7
+    header = json.dumps({"counts": counts, "tables": toc}).encode("utf-8")
+    header += b" " * (-(len(MAGIC) + 4 + len(header)) % 8)
+
+    tmpPath = f"{path}.{os.getpid()}.tmp"
+    with open(tmpPath, 'wb') as file:
+        file.write(MAGIC + struct.pack("<I", len(header)) + header)
+        for table in tables.values():
+            raw = table.tobytes()
+            file.write(raw + b"\0" * (-len(raw) % 8))
+    os.replace(tmpPath, path)
+
+def loadProblem(path):
+    """Memory-maps a cache entry and returns it as a CompiledProblem, None if the file is not a valid cache entry
+
+    Parameters:
+        path (str): cache entry to load
+    """
+    with open(path, 'rb') as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    if buffer[:len(MAGIC)] != MAGIC:
+        return None
+    headerLength, = struct.unpack_from("<I", buffer, len(MAGIC))
+    start = len(MAGIC) + 4
+    header = json.loads(buffer[start:start + headerLength])
+    start += headerLength
+    counts = header["counts"]
+
+    # Zero-copy views of every table
+    view = memoryview(buffer)
+    tables = {}
+    for name, (typecode, offset, count) in header["tables"].items():
+        size = array(typecode).itemsize
+        tables[name] = view[start + offset:start + offset + count * size].cast(typecode)
+
+    strings = bytes(tables["strings"]).decode("utf-8").split("\n")
+    numItems, numGameSlots = counts["numItems"], counts["numGameSlots"]
+    model = CompiledProblem(
+        strings[:numItems],
+        counts["numGames"],
+        strings[numItems:numItems + numGameSlots],
+        strings[numItems + numGameSlots:numItems + numGameSlots + counts["numPracSlots"]],
+        allocate=False,
+    )
+    for name in ("gameMax", "gameMin", "pracMax", "pracMin", "prefTotal", "partial", "ageTier", "division"):
+        setattr(model, name, tables[name])
+    model.incompat = unflatten(tables["incompatOffsets"], tables["incompat"])
+    model.pairsOf = unflatten(tables["pairsOfOffsets"], tables["pairsOf"])
+    model.gameOverlaps = unflatten(tables["gameOverlapOffsets"], tables["gameOverlaps"])
+    model.pracOverlaps = unflatten(tables["pracOverlapOffsets"], tables["pracOverlaps"])
+    model.pref = unflatten(tables["slotOffsets"], tables["pref"])
+    model.unwanted = unflatten(tables["slotOffsets"], tables["unwanted"])
+    pairs = tables["pairs"]
+    model.pairs = [(pairs[k], pairs[k + 1]) for k in range(0, len(pairs), 2)]
+    model.buildMasks() # derived from incompat, not stored
+    return model
+
+def loadOrCompile(fileInput, cacheDir, build):
+    """Returns the compiled problem for an input file from the cache, building and caching it on a miss
+
+    Parameters:
+        fileInput (str): path of the input file
+        cacheDir (str): directory the cache entries are kept in
+        build (function): called with no arguments on a miss, parses the input and returns its CompiledProblem
+    Returns:
+        (CompiledProblem, bool): the problem and whether it was read from the cache
+    """
+    path = cachePath(cacheDir, fileInput)
+    if os.path.exists(path):
+        model = loadProblem(path)
+        if model is not None:
+            return model, True
+
+    model = build()
+    os.makedirs(cacheDir, exist_ok=True)
+    saveProblem(model, path)
+    return model, False
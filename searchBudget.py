@@ -0,0 +1,91 @@
+import math
+import multiprocessing
+import time
+
+"""
+    Time, node and solution budget of an anytime search
+    The search charges the budget every few nodes and stops once it is spent, returning the best schedule found so
+    far. A budget may be shared by the worker processes of a parallel search, the node and solution counts are then
+    kept in a multiprocessing.Array so the limits apply to all workers together.
+"""
+
+# Positions of the counters in Budget.shared
+NODES = 0
+SOLUTIONS = 1
+
+class Budget:
+    """
+    Attributes:
+        start (float): time.monotonic() when the budget was created
+        deadline (float): time.monotonic() at which the search stops, inf without a time limit
+        nodeLimit (float): number of nodes after which the search stops, inf without a node limit
+        solutionLimit (float): number of improved schedules after which the search stops, inf without a limit
+        nodes (int): nodes charged so far (by this process, see shared)
+        solutions (int): improved schedules charged so far (by this process, see shared)
+        shared (multiprocessing.Array): node and solution counts of every process, None while the budget is not shared
+        exhausted (bool): True once the budget ran out, the schedule found is then not proven optimal
+    """
+    def __init__(self, timeLimit=0, nodeLimit=0, solutionLimit=0):
+        """
+        Parameters:
+            timeLimit (float): seconds the search may run, 0 for no limit
+            nodeLimit (int): nodes the search may expand, 0 for no limit
+            solutionLimit (int): improved schedules the search may find, 0 for no limit (1 stops at the first
+                feasible schedule)
+        """
+        self.start = time.monotonic()
+        self.deadline = self.start + timeLimit if timeLimit else math.inf
+        self.nodeLimit = nodeLimit or math.inf
+        self.solutionLimit = solutionLimit or math.inf
+        self.nodes = 0
+        self.solutions = 0
+        self.shared = None
+        self.exhausted = False
+
+    def __repr__(self):
+        return f"Budget(elapsed={self.elapsed():.3f}s, nodes={self.nodes}, exhausted={self.exhausted})"
+
+    @property
+    def limited(self):
+        """True if the budget has a time, node or solution limit"""
+        return self.deadline < math.inf or self.nodeLimit < math.inf or self.solutionLimit < math.inf
+
+    def share(self):
+        """Makes the node and solution counts shared, call before the budget is handed to worker processes"""
+        self.shared = multiprocessing.Array('q', 2)
+
+    def elapsed(self):
+        """Returns the seconds since the budget was created"""
+        return time.monotonic() - self.start
+
+    def charge(self, counter, amount):
+        """Adds amount to a counter (NODES or SOLUTIONS), returns the total over every process sharing the budget"""
+        if counter == NODES:
+            self.nodes += amount
+            total = self.nodes
+        else:
+            self.solutions += amount
+            total = self.solutions
+        if self.shared is not None:
+            with self.shared.get_lock():
+                self.shared[counter] += amount
+                total = self.shared[counter]
+        return total
+
+    def spend(self, nodes):
+        """
+        Charges nodes to the budget, returns False once the budget is exhausted
+
+        Parameters:
+            nodes (int): number of nodes expanded since the last charge
+        """
+        if (self.charge(NODES, nodes) >= self.nodeLimit or time.monotonic() >= self.deadline
+                or (self.shared is not None and self.shared[SOLUTIONS] >= self.solutionLimit)):
+            self.exhausted = True
+        return not self.exhausted
+
+    def found(self):
+        """Charges one improved schedule to the budget, returns False once the budget is exhausted"""
+        if self.charge(SOLUTIONS, 1) >= self.solutionLimit:
+            self.exhausted = True
+        return not self.exhausted
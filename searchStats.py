@@ -0,0 +1,139 @@
+import atexit
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from domains import Domains
+from hardConstraints import HardConstraintEngine
+
+"""
+    Search statistics: counters of the search loops and per-phase timers
+    Collection is off until enable() is called. While it is off the searches keep their counters in local variables
+    and only hand them over (record) once a search ends, the hard constraint engine and the domains are the plain
+    classes and phase() returns a shared no-op context, so the cost is one check per search and per phase.
+    While it is on, watch() hands a search a counting view of its engine and domains: an object of a subclass that
+    shares the state of the original and also counts every HC call, every rejection by hard constraint and every slot
+    removed by forward checking. The original object (Ex. the start state's engine, prob.sched.engine) keeps its own
+    class, so searches run after collection is turned off do not pay for counting.
+
+    Counters (see SearchStats.asDict):
+        nodes: search nodes expanded (DFS frames visited, best-first leafs popped)
+        children: child leafs/candidate slots produced by div/expand
+        prunes: children cut because their bound is no better than the incumbent
+        wipeouts: assignments undone because forward checking emptied a domain
+        incumbentUpdates: improved complete schedules found
+        maxFrontier: largest number of open leafs (best-first heap, DFS stack, parallel split frontier)
+        maxDepth: deepest assignment depth reached
+        hcCalls, hcRejected: HardConstraintEngine.check calls and the rejected ones by hard constraint
+        forwardChecks: slots removed from domains by forward checking, by hard constraint
+"""
+
+stats = None # SearchStats of this process, None while collection is off
+
+class SearchStats:
+    """
+    Attributes:
+        counters (dict): counter name -> total
+        maxima (dict): counter name -> largest value recorded
+        hcRejected (dict): hard constraint name -> HC calls rejected by it
+        forwardChecks (dict): hard constraint name -> domain slots removed by forward checking because of it
+        phases (dict): phase name -> seconds spent in it
+    """
+    def __init__(self):
+        self.counters = dict.fromkeys(("nodes", "children", "prunes", "wipeouts", "incumbentUpdates", "hcCalls"), 0)
+        self.maxima = dict.fromkeys(("maxFrontier", "maxDepth"), 0)
+        self.hcRejected = {}
+        self.forwardChecks = {}
+        self.phases = {}
+
+    def __repr__(self):
+        return f"SearchStats({', '.join(f'{name}={value}' for name, value in {**self.counters, **self.maxima}.items())})"
+
+    def record(self, **counts):
+        """Adds counts to the counters, or raises the maxima for the max... names"""
+        for name, value in counts.items():
+            if name in self.maxima:
+                self.maxima[name] = max(self.maxima[name], value)
+            else:
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def phase(self, name):
+        """Context that adds the seconds spent inside it to phase name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def merge(self, other):
+        """Adds the statistics of another process (a dict from asDict) to these"""
+        self.record(**{name: other[name] for name in (*self.counters, *self.maxima) if name in other})
+        for mine, theirs in ((self.hcRejected, other["hcRejected"]), (self.forwardChecks, other["forwardChecks"]),
+                             (self.phases, other["phases"])):
+            for name, value in theirs.items():
+                mine[name] = mine.get(name, 0) + value
+
+    def asDict(self):
+        """Returns every counter, maximum and phase time as a JSON-serializable dict"""
+        return {**self.counters, **self.maxima, "hcRejected": dict(self.hcRejected),
+                "forwardChecks": dict(self.forwardChecks), "phases": dict(self.phases)}
+
+class CountingEngine(HardConstraintEngine):
+    """HardConstraintEngine that also counts its check calls and the hard constraint behind every rejection"""
+    def check(self, item, slot):
+        allowed = HardConstraintEngine.check(self, item, slot)
+        if stats is not None:
+            stats.counters["hcCalls"] += 1
+            if not allowed:
+                reason = self.violation(item, slot)
+                stats.hcRejected[reason] = stats.hcRejected.get(reason, 0) + 1
+        return allowed
+
+class CountingDomains(Domains):
+    """Domains that also count the slots forward checking removes, by the hard constraint that removes them"""
+    def remove(self, item, slot, reason=None):
+        if stats is not None:
+            stats.forwardChecks[reason] = stats.forwardChecks.get(reason, 0) + 1
+        return Domains.remove(self, item, slot, reason)
+
+COUNTING = {HardConstraintEngine: CountingEngine, Domains: CountingDomains} # counting view class of every watched class
+
+def enable():
+    """Turns collection on in this process with fresh statistics, returns them"""
+    global stats
+    stats = SearchStats()
+    return stats
+
+def disable():
+    """Turns collection off, returns the statistics collected so far (None if it was off)"""
+    global stats
+    collected, stats = stats, None
+    return collected
+
+def phase(name):
+    """Returns a context timing phase name, a no-op context while collection is off"""
+    return stats.phase(name) if stats is not None else nullcontext()
+
+def watch(target):
+    """
+    Returns a view of a HardConstraintEngine or Domains that counts its work while collection is on, the target itself
+    while it is off. The view shares the target's state (the same __dict__), so assignments made through one are seen
+    by the other, but the target's class is never changed
+
+    Parameters:
+        target (HardConstraintEngine | Domains): object to count the HC calls/forward checking of
+    """
+    counting = COUNTING.get(type(target)) if stats is not None else None
+    if counting is None:
+        return target
+    view = counting.__new__(counting)
+    view.__dict__ = target.__dict__
+    return view
+
+def dumpAtExit(path):
+    """Writes the statistics as JSON to path when the process exits"""
+    def dump():
+        if stats is not None:
+            with open(path, "w") as file:
+                json.dump(stats.asDict(), file, indent=2)
+    atexit.register(dump)
@@ -0,0 +1,254 @@
+from array import array
+from dataclasses import dataclass
+
+"""
+    Soft constraint (Eval) computation
+    Eval = minfilled * wminfilled + pref * wpref + pair * wpair + secdiff * wsecdiff, where
+        minfilled: pen_gamemin/pen_practicemin for every game/practice a slot is short of its min
+        pref: the preference value of every preference whose item is not in the preferred slot
+        pair: pen_notpaired for every pair whose items are not at the same time
+        secdiff: pen_section for every two games of one age/tier but different divisions in the same slot
+    Items that are not assigned yet add nothing to pref, pair and secdiff, so the same formula scores partial schedules
+"""
+
+@dataclass
+class Weights:
+    minFilled: int = 1
+    pref: int = 1
+    pair: int = 1
+    secDiff: int = 1
+    gameMinPen: int = 1
+    practiceMinPen: int = 1
+    notPairedPen: int = 1
+    sectionPen: int = 1
+
+    @staticmethod
+    def fromWeightsAndPenalties(w):
+        """Returns the Weights of a problem instance's WeightsAndPenalties (read off the command line by the parser)"""
+        return Weights(
+            int(w.getMinFilledWeight()), int(w.getPrefWeight()), int(w.getPairWeight()), int(w.getSecDiffWeight()),
+            int(w.getGameMinPen()), int(w.getPracticeMinPen()), int(w.getNotPairedPen()), int(w.getSectionPen()),
+        )
+
+def evalAssignment(model, weights, assignment):
+    """
+    Full recomputation of Eval for an assignment, O(schedule)
+
+    Parameters:
+        model (CompiledProblem): the problem
+        weights (Weights): weights and penalties
+        assignment (sequence): slot of every item, -1 for unassigned items
+    """
+    gameCount = [0] * len(model.gameSlotIds)
+    pracCount = [0] * len(model.pracSlotIds)
+    pref = 0
+    sections = {} # (ageTier, slot) -> [divisions of the games in the slot]
+    for item in range(model.numItems):
+        slot = assignment[item]
+        if slot < 0:
+            continue
+        pref += model.prefTotal[item] - model.pref[item][slot]
+        if model.isGame(item):
+            gameCount[slot] += 1
+            sections.setdefault((model.ageTier[item], slot), []).append(model.division[item])
+        else:
+            pracCount[slot] += 1
+
+    minFilled = (sum(max(0, model.gameMin[s] - gameCount[s]) for s in range(len(gameCount))) * weights.gameMinPen
+                 + sum(max(0, model.pracMin[s] - pracCount[s]) for s in range(len(pracCount))) * weights.practiceMinPen)
+
+    pair = sum(
+        1 for a, b in model.pairs
+        if assignment[a] >= 0 and assignment[b] >= 0 and not model.together(a, assignment[a], b, assignment[b])
+    ) * weights.notPairedPen
+
+    secDiff = 0
+    for divisions in sections.values():
+        for k, division in enumerate(divisions):
+            secDiff += sum(1 for other in divisions[k + 1:] if other != division)
+    secDiff *= weights.sectionPen
+
+    return minFilled * weights.minFilled + pref * weights.pref + pair * weights.pair + secDiff * weights.secDiff
+
+class DeltaEvaluator:
+    """
+    Running Eval of a (partial) schedule that is updated one assignment at a time
+
+    delta(item, slot) returns the change in Eval that assigning item to slot would cause, in O(1) plus the item's
+    pair count, using running per-slot fill deficits, the item's preference penalty for the slot, the slots of its
+    pair partners and per (age/tier, slot) section counts.
+
+    Attributes:
+        model (CompiledProblem): the problem being scheduled
+        weights (Weights): weights and penalties
+        assignment (array): slot of every item, -1 while the item is unassigned
+        gameDeficit, pracDeficit (int): total number of games/practices all slots are short of their min
+        prefPenalty (int): sum of the unsatisfied preference values of the assigned items
+        notPaired (int): number of pairs with both items assigned at different times
+        sectionClashes (int): number of same age/tier, different division game pairs sharing a slot
+        remainingGames, remainingPracs (int): number of unassigned games/practices
+        remainingMinPref (int): sum of the smallest preference penalty each unassigned item can still get
+    """
+    def __init__(self, model, weights):
+        self.model = model
+        self.weights = weights
+        self.assignment = array('i', [-1] * model.numItems)
+        self.gameCount = array('i', [0] * len(model.gameSlotIds))
+        self.pracCount = array('i', [0] * len(model.pracSlotIds))
+        self.gameDeficit = sum(model.gameMin)
+        self.pracDeficit = sum(model.pracMin)
+        self.prefPenalty = 0
+        self.notPaired = 0
+        self.sectionClashes = 0
+        self.remainingGames = model.numGames
+        self.remainingPracs = model.numItems - model.numGames
+        self.minPref = array('i', [model.prefTotal[i] - max(model.pref[i], default=0) for i in range(model.numItems)])
+        self.remainingMinPref = sum(self.minPref)
+        self.tierCount = {}    # (ageTier, slot) -> number of games of the age/tier in the slot
+        self.tierDivCount = {} # (ageTier, division, slot) -> number of games of the age/tier and division in the slot
+
+        # Eval change per unit of every component
+        self.gameFillCost = weights.minFilled * weights.gameMinPen
+        self.pracFillCost = weights.minFilled * weights.practiceMinPen
+        self.pairCost = weights.pair * weights.notPairedPen
+        self.sectionCost = weights.secDiff * weights.sectionPen
+
+    @property
+    def value(self):
+        """Returns the Eval of the current assignment"""
+        return (self.gameDeficit * self.gameFillCost + self.pracDeficit * self.pracFillCost
+                + self.prefPenalty * self.weights.pref + self.notPaired * self.pairCost
+                + self.sectionClashes * self.sectionCost)
+
+    def lowerBound(self):
+        """
+        Returns an admissible lower bound on the Eval of every completion of the current assignment
+        Pair and section penalties already incurred can only grow, every unassigned item adds at least its smallest
+        preference penalty and every unassigned item can lower the fill deficit by at most one
+        The bound equals value once every item is assigned
+        """
+        return (max(0, self.gameDeficit - self.remainingGames) * self.gameFillCost
+                + max(0, self.pracDeficit - self.remainingPracs) * self.pracFillCost
+                + (self.prefPenalty + self.remainingMinPref) * self.weights.pref
+                + self.notPaired * self.pairCost + self.sectionClashes * self.sectionCost)
+
+    def boundAfter(self, item, slot):
+        """
+        Returns lowerBound() as it would be after assigning the unassigned item to slot, without assigning it
+
+        Parameters:
+            item (int): item id of the game/practice to place
+            slot (int): slot id (of the item's kind) to place it in
+        """
+        model = self.model
+        gameDeficit, pracDeficit = self.gameDeficit, self.pracDeficit
+        remainingGames, remainingPracs = self.remainingGames, self.remainingPracs
+        bound = (self.prefPenalty + self.remainingMinPref + model.prefTotal[item] - model.pref[item][slot]
+                 - self.minPref[item]) * self.weights.pref
+        bound += (self.notPaired + (self.unpaired(item, slot) if model.pairsOf[item] else 0)) * self.pairCost
+        clashes = self.sectionClashes
+        if item < model.numGames:
+            remainingGames -= 1
+            if self.gameCount[slot] < model.gameMin[slot]:
+                gameDeficit -= 1
+            tier = model.ageTier[item]
+            clashes += self.tierCount.get((tier, slot), 0) - self.tierDivCount.get((tier, model.division[item], slot), 0)
+        else:
+            remainingPracs -= 1
+            if self.pracCount[slot] < model.pracMin[slot]:
+                pracDeficit -= 1
+        return (bound + clashes * self.sectionCost
+                + max(0, gameDeficit - remainingGames) * self.gameFillCost
+                + max(0, pracDeficit - remainingPracs) * self.pracFillCost)
+
+    def unpaired(self, item, slot):
+        """Returns the number of assigned pair partners of item that are not at the same time as item in slot"""
+        model, assignment = self.model, self.assignment
+        count = 0
+        for partner in model.pairsOf[item]:
+            partnerSlot = assignment[partner]
+            if partnerSlot >= 0 and partnerSlot not in model.conflictSlots(item, slot, partner):
+                count += 1
+        return count
+
+    def delta(self, item, slot):
+        """
+        Returns the change in Eval caused by assigning the unassigned item to slot
+
+        Parameters:
+            item (int): item id of the game/practice to place
+            slot (int): slot id (of the item's kind) to place it in
+        """
+        model = self.model
+        change = (model.prefTotal[item] - model.pref[item][slot]) * self.weights.pref
+        if model.pairsOf[item]:
+            change += self.unpaired(item, slot) * self.pairCost
+        if item < model.numGames:
+            if self.gameCount[slot] < model.gameMin[slot]:
+                change -= self.gameFillCost
+            tier = model.ageTier[item]
+            clashes = self.tierCount.get((tier, slot), 0) - self.tierDivCount.get((tier, model.division[item], slot), 0)
+            change += clashes * self.sectionCost
+        elif self.pracCount[slot] < model.pracMin[slot]:
+            change -= self.pracFillCost
+        return change
+
+    def assign(self, item, slot):
+        """
+        Places item in slot and updates the running Eval
+
+        Parameters:
+            item (int): item id of the game/practice to place
+            slot (int): slot id (of the item's kind) to place it in
+        """
+        model = self.model
+        self.prefPenalty += model.prefTotal[item] - model.pref[item][slot]
+        self.remainingMinPref -= self.minPref[item]
+        if model.pairsOf[item]:
+            self.notPaired += self.unpaired(item, slot)
+        if item < model.numGames:
+            self.remainingGames -= 1
+            if self.gameCount[slot] < model.gameMin[slot]:
+                self.gameDeficit -= 1
+            self.gameCount[slot] += 1
+            tier, division = model.ageTier[item], model.division[item]
+            tierKey, divKey = (tier, slot), (tier, division, slot)
+            self.sectionClashes += self.tierCount.get(tierKey, 0) - self.tierDivCount.get(divKey, 0)
+            self.tierCount[tierKey] = self.tierCount.get(tierKey, 0) + 1
+            self.tierDivCount[divKey] = self.tierDivCount.get(divKey, 0) + 1
+        else:
+            self.remainingPracs -= 1
+            if self.pracCount[slot] < model.pracMin[slot]:
+                self.pracDeficit -= 1
+            self.pracCount[slot] += 1
+        self.assignment[item] = slot
+
+    def unassign(self, item):
+        """
+        Removes item from its slot, undoing assign
+
+        Parameters:
+            item (int): item id of the assigned game/practice
+        """
+        model = self.model
+        slot = self.assignment[item]
+        self.assignment[item] = -1
+        self.prefPenalty -= model.prefTotal[item] - model.pref[item][slot]
+        self.remainingMinPref += self.minPref[item]
+        if model.pairsOf[item]:
+            self.notPaired -= self.unpaired(item, slot)
+        if item < model.numGames:
+            self.remainingGames += 1
+            self.gameCount[slot] -= 1
+            if self.gameCount[slot] < model.gameMin[slot]:
+                self.gameDeficit += 1
+            tier, division = model.ageTier[item], model.division[item]
+            tierKey, divKey = (tier, slot), (tier, division, slot)
+            self.tierCount[tierKey] -= 1
+            self.tierDivCount[divKey] -= 1
+            self.sectionClashes -= self.tierCount[tierKey] - self.tierDivCount[divKey]
+        else:
+            self.remainingPracs += 1
+            self.pracCount[slot] -= 1
+            if self.pracCount[slot] < model.pracMin[slot]:
+                self.pracDeficit += 1
@@ -1,64 +1,215 @@
-from parserFile import parser, data
+from parserFile import parseFile, setWeights, splitCommandLine, checkCommandLine, parseIntOption, parseChoiceOption, data
 from dataclasses import dataclass
 from constants import *
+from compiledProblem import compileProblem
+from problemCache import loadOrCompile
+from hardConstraints import HardConstraintEngine
+from presolve import presolve
+from softConstraints import Weights
+from parallelSearch import parallelSearch
+from searchBudget import Budget
+from localSearch import improve
+from geneticSearch import geneticSearch
+import searchStats
 import sys
 
+ENGINES = ("tree", "genetic") # search engines of the --engine option
+GENETIC_SECONDS = 10 # run time of the genetic search without --time-limit
+
 """
     Start state functionality from the project proposal
-    Start state creates the initial problem state and fulfills all partial assignments (if any) from the input
+    Start state creates the initial problem state, fulfills all partial assignments (if any) from the input and
+    fixes the games/practices left with a single legal slot (see presolve.py)
+    With "--cache DIR" on the command line the compiled problem is read from / written to a cache keyed by the
+    input file's hash, so a cache hit skips the parser entirely
+    With "--stats FILE" on the command line search statistics and phase times are collected and written to FILE as
+    JSON when the program exits (see searchStats.py)
+    Prints the error and exits on invalid input or when presolve finds that no schedule satisfies the hard constraints
     @return: Initial problem state 
 """
 def start():
-    # Parse the input
-    parser(sys.argv)
+    searchInput, options = splitCommandLine(sys.argv)
+    commandLineInputs = checkCommandLine(searchInput)
+    if options.get("stats"):
+        searchStats.enable()
+        searchStats.dumpAtExit(options["stats"])
+
+    try:
+        return parse(commandLineInputs[0], commandLineInputs[1:], options.get("cache"))
+    except data.InfeasibleProblemError as e:
+        print(f"No valid schedule satisfies the hard constraints: {e}")
+        sys.exit()
+    except data.InvalidInputError as e:
+        print(f"Caught Invalid Input Error: {e}")
+        sys.exit()
+
+"""
+    Parses an input file and creates its initial problem state, nothing is printed
+    Library entry point, Ex. solve(parse("./test.txt", [1, 1, 1, 1, 1, 1, 1, 1]))
+    @param path: Path of the input file
+    @param weights: wminfilled, wpref, wpair, wsecdiff, pen_gamemin, pen_practicemin, pen_notpaired and pen_section
+    @param cacheDir: Optional directory of the compiled problem cache (see problemCache.py)
+    @return: Initial problem state
+    @raise data.InvalidInputError: If the input file or the weights are not valid
+    @raise data.InfeasibleProblemError: If presolve finds that no schedule satisfies the hard constraints (a subclass
+                                        of data.InvalidInputError)
+    Every call parses into a ProblemInstance of its own, so any number of inputs can be parsed and solved in one
+    process (one after the other or in threads)
+"""
+def parse(path, weights, cacheDir=None):
+    instance = data.ProblemInstance()
+    setWeights(weights, instance)
+
+    # Parse the input, or load its compiled form from the cache
+    with searchStats.phase("parse"):
+        if cacheDir:
+            model, _ = loadOrCompile(path, cacheDir, lambda: parseAndCompile(path, instance))
+        else:
+            model = parseAndCompile(path, instance)
 
+    with searchStats.phase("start"):
+        return initialState(model, Weights.fromWeightsAndPenalties(instance.weights))
+
+"""
+    Creates the initial problem state of a compiled problem, fulfills all partial assignments (if any) and fixes the
+    games/practices that have a single legal slot left (see presolve.py)
+    @param model: CompiledProblem of the input
+    @param weights: Weights and penalties of the search, all 1 if not given
+    @return: Initial problem state, with the presolve report in pr.presolve
+    @raise data.InfeasibleProblemError: If presolve finds that no schedule satisfies the hard constraints
+"""
+def initialState(model, weights=None):
     # Create the start state 
     pr = Problem(
         sched = Schedule(
             # Initialize the schedule with parsed game and practice slots
-            gameSlots= {key: [] for key in data.GameSlots.gameSlotsDict.keys()},
-            pracSlots= {key: [] for key in data.PracticeSlots.practiceSlotsDict.keys()}
+            gameSlots= {key: [] for key in model.gameSlotIds},
+            pracSlots= {key: [] for key in model.pracSlotIds},
+            engine= HardConstraintEngine(model)
         ),
-        # Get the remaining games and practices
-        remGames = data.Games.getGames(),
-        remPracs = data.Practices.getPractices()
+        # Get the remaining games and practices as item ids
+        remGames = list(range(model.numGames)),
+        remPracs = list(range(model.numGames, model.numItems)),
+        # Integer-indexed tables used by HC/SC/div/ftrans
+        model = model,
+        weights = weights or Weights()
     )
 
-    # Fulfill partial assignments for games
-    for game in pr.remGames:
-        preferredSlot = game.getPartialAssignmentSlot()
-
-        ## !!! RAY-A this is as simple as adding a game to a slot would be
-        if (preferredSlot):
-            if (HC(pr.sched, preferredSlot.id, game.identifier)):
-                pr.sched.gameSlots[preferredSlot.id].append(game.identifier)
-                pr.remGames.remove(game)
-            else:
-                raise print(f"Invalid slot for partial assignment; no valid assignment possible with HC")
-
-    for prac in pr.remPracs:
-        preferredSlot = prac.getPartialAssignmentSlot()
-
-        ## !!! RAY-A this is as simple as adding a prac to a slot would be
-        if (preferredSlot):
-            if (HC(pr.sched, preferredSlot.id, prac.identifier)):
-                pr.sched.pracSlots[preferredSlot.id].append(prac.identifier)
-                pr.remPracs.remove(prac)
-            else:
-                raise print(f"Invalid slot for partial assignment; no valid assignment possible with HC")
-
-    print(pr)
+    # Fulfill partial assignments and fix every item left with a single legal slot
+    pr.presolve = presolve(pr)
     return pr
 
+"""
+    Runs the parser and compiles the parsed objects
+    @param path: Path of the input file
+    @param instance: ProblemInstance the parser fills
+    @return: CompiledProblem of the input
+"""
+def parseAndCompile(path, instance):
+    parseFile(path, instance)
+    return compileProblem(instance)
+
 """
     Calculate hard constraints on a match for a given slot
+    The check is answered by the schedule's incremental engine in O(1), see hardConstraints.py
     @param sched: Complete schedule to check against
-    @param slotToCheck: The slot to which a game/practice is being added
-    @param match: Specific game/practice that is being added
+    @param slotToCheck: The slot id (Ex. "mo-8:00") to which a game/practice is being added
+    @param match: Identifier of the specific game/practice that is being added
     @return: True if slot is valid, False otherwise
 """
 def HC(sched, slotToCheck, match):
-    # Check if slot is valid based on hard constraints
-    return True
+    model = sched.engine.model
+    item = model.itemIndex[match]
+    return sched.engine.check(item, model.slotIndexFor(item)[slotToCheck])
+
+"""
+    Runs the search on the start state with the options of the command line
+    With "--workers N" on the command line the search is split over N worker processes (see parallelSearch.py)
+    With "--time-limit SECONDS" and/or "--node-limit NODES" the search stops when the budget runs out and returns the
+    best schedule found so far; every improved schedule is printed as soon as it is found
+    With "--improve SECONDS" the tree search stops at its first feasible schedule, which is then improved by local
+    search (see localSearch.py) for the given number of seconds
+    With "--engine genetic" the genetic search (see geneticSearch.py) is used instead of the tree search, for
+    --time-limit seconds (GENETIC_SECONDS by default)
+    @param pr: Initial problem state from start()
+    @return: Best solution found (with its Eval), None if no schedule satisfies the hard constraints
+"""
+def search(pr):
+    _, options = splitCommandLine(sys.argv)
+    engine = parseChoiceOption(options, "engine", ENGINES, "tree")
+    improveSeconds = parseIntOption(options, "improve", 0)
+    timeLimit, nodeLimit = parseIntOption(options, "time-limit", 0), parseIntOption(options, "node-limit", 0)
+
+    if engine == "genetic":
+        budget = Budget(timeLimit or GENETIC_SECONDS, nodeLimit)
+    else:
+        budget = Budget(timeLimit, nodeLimit, 1 if improveSeconds else 0)
+    onImprove = printImprovement if engine == "genetic" or budget.limited else None
+    solution = solve(pr, budget, parseIntOption(options, "workers", 1), engine, improveSeconds, onImprove)
+
+    if budget.exhausted and not (solution and improveSeconds):
+        print(f"Search budget exhausted after {budget.elapsed():.2f}s, the schedule below is not proven optimal")
+    return solution
+
+"""
+    Runs the search on an initial problem state, nothing is printed
+    Library entry point, Ex. solve(parse("./test.txt", [1, 1, 1, 1, 1, 1, 1, 1]), Budget(60))
+    @param pr: Initial problem state from parse()
+    @param budget: Optional Budget of the search; once it is exhausted (budget.exhausted) the best schedule so far
+                   is returned. Without one the tree search runs to optimality and the genetic search for
+                   GENETIC_SECONDS
+    @param workers: Number of worker processes of the tree search (see parallelSearch.py)
+    @param engine: "tree" or "genetic" (see geneticSearch.py)
+    @param improveSeconds: If not 0, the first feasible schedule of the tree search is improved by local search for
+                           this many seconds (see localSearch.py)
+    @param onImprove: Optional function called with (solution, elapsed seconds) for every improved schedule
+    @return: Best solution found (with its Eval), None if no schedule satisfies the hard constraints
+"""
+def solve(pr, budget=None, workers=1, engine="tree", improveSeconds=0, onImprove=None):
+    with searchStats.phase("search"):
+        if engine == "genetic":
+            solution = geneticSearch(pr, budget or Budget(GENETIC_SECONDS), onImprove=onImprove)
+        else:
+            solution = parallelSearch(pr, workers, budget or Budget(solutionLimit=1 if improveSeconds else 0), onImprove)
+
+    if solution and improveSeconds:
+        with searchStats.phase("improve"):
+            solution = improve(pr, solution, Budget(improveSeconds), onImprove=onImprove)
+    return solution
+
+"""
+    Prints an improved schedule found by an anytime search
+    @param solution: Problem holding the improved schedule and its Eval
+    @param elapsed: Seconds since the search started
+"""
+def printImprovement(solution, elapsed):
+    print(f"Improved schedule found after {elapsed:.2f}s")
+    printSolution(solution)
+    sys.stdout.flush()
+
+"""
+    Prints a solution as the Eval-value followed by the slot of every game/practice, sorted by identifier
+    @param solution: Problem returned by the search, None if there is no valid schedule
+"""
+def printSolution(solution):
+    if solution is None:
+        print("No valid schedule satisfies the hard constraints")
+        return
+
+    rows = []
+    for slots in (solution.sched.gameSlots, solution.sched.pracSlots):
+        for slotId, identifiers in slots.items():
+            day, time = slotId.split("-")
+            rows += [(identifier, f"{day.upper()}, {time}") for identifier in identifiers]
 
-start()
+    width = max((len(identifier) for identifier, _ in rows), default=0)
+    print(f"Eval-value: {solution.eval}")
+    for identifier, slot in sorted(rows):
+        print(f"{identifier.ljust(width)} : {slot}")
+
+# Worker processes of a parallel search may import this file, only the main process runs the search
+if __name__ == "__main__":
+    pr = start()
+    print(pr)
+    print(pr.presolve)
+    printSolution(search(pr))
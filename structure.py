@@ -1,54 +1,175 @@
 # General code structure for AND tree
+# Leafs are persistent: a leaf stores only its new assignment and a parent pointer (constants.Leaf), and a single
+# LeafCursor moves the hard constraint engine and the soft constraint evaluator between leafs by undoing and redoing
+# assignments. Full schedules are only materialized for solutions.
+# No transposition table is consulted: every leaf branches on the slots of a single item, so two different paths
+# differ in that item's slot and no partial assignment is reached twice (the subtrees of parallelSearch's workers are
+# disjoint the same way). Duplicate subtrees cannot occur, a lookup per leaf would never hit.
+import heapq
+import random
+import searchStats
+from constants import Leaf, Problem, Schedule
+from softConstraints import DeltaEvaluator
+from symmetry import Symmetry
+
+"""
+    Keeps the hard constraint engine and the soft constraint evaluator in the state of one leaf at a time
+    engine: HardConstraintEngine of the start state, mutated while the cursor moves and restored by reset()
+    evaluator: DeltaEvaluator holding the same assignments as engine
+    leaf: the leaf the engine/evaluator currently describe
+    unassigned: set of the item ids that are not assigned at leaf
+    order: remaining items in ftrans order
+    symmetry: interchangeable items/slots of the problem, kept up to date with the cursor's assignments
+"""
+class LeafCursor:
+    def __init__(self, prob, weights, seed=0):
+        self.model = prob.model
+        self.engine = searchStats.watch(prob.sched.engine)
+        self.evaluator = DeltaEvaluator(prob.model, weights)
+        for item, slot in enumerate(self.engine.assignment):
+            if slot >= 0:
+                self.evaluator.assign(item, slot)
+        self.root = Leaf(None, -1, -1, self.evaluator.value)
+        self.leaf = self.root
+        self.unassigned = set(prob.remGames + prob.remPracs) - {i for i in range(self.model.numItems) if self.engine.isAssigned(i)}
+        self.symmetry = Symmetry(self.model, self.engine)
+
+        # ftrans order: highest preference value first, then items that want to be paired, ties broken at random
+        rand = random.Random(seed)
+        self.order = sorted(
+            self.unassigned,
+            key=lambda i: (-max(self.model.pref[i], default=0), not self.model.pairsOf[i], rand.random())
+        )
+
+    """
+        Assigns item to slot in the engine and the evaluator
+        @param item: Item id of the game/practice
+        @param slot: Slot id to put it in
+    """
+    def assign(self, item, slot):
+        self.engine.assign(item, slot)
+        self.evaluator.assign(item, slot)
+        self.symmetry.assign(item)
+        self.unassigned.discard(item)
+
+    """
+        Removes the assignment of item from the engine and the evaluator
+        @param item: Item id of the assigned game/practice
+    """
+    def unassign(self, item):
+        self.engine.unassign(item)
+        self.evaluator.unassign(item)
+        self.symmetry.unassign(item)
+        self.unassigned.add(item)
+
+    """
+        Applies the assignment of a leaf to the engine and the evaluator
+        @param leaf: child of the cursor's current leaf
+    """
+    def do(self, leaf):
+        self.assign(leaf.item, leaf.slot)
+        self.leaf = leaf
+
+    """
+        Removes the assignment of the cursor's current leaf and moves to its parent
+    """
+    def undo(self):
+        self.unassign(self.leaf.item)
+        self.leaf = self.leaf.parent
+
+    """
+        Moves the cursor to any leaf of the tree through the closest common ancestor
+        Costs O(distance between the two leafs)
+        @param target: Leaf to move to
+    """
+    def moveTo(self, target):
+        while self.leaf.depth > target.depth:
+            self.undo()
+        path = []
+        while target.depth > self.leaf.depth:
+            path.append(target)
+            target = target.parent
+        while self.leaf is not target:
+            self.undo()
+            path.append(target)
+            target = target.parent
+        for leaf in reversed(path):
+            self.do(leaf)
+
+    """
+        Moves the cursor back to the root so the engine holds the start state again
+    """
+    def reset(self):
+        self.moveTo(self.root)
 
 """
     Main code loop for AND tree search algorithm
     @param prob: Initial problem state 
-    @return: Solution to the problem
+    @return: Solution to the problem (with its Eval), None if no schedule satisfies the hard constraints
 """
 def treeSearch(prob):
-    # Initially, prob is a list of the initial problem state
-    # Insert prob into max heap and calculate SC()? 
-    heap = []
+    cursor = LeafCursor(prob, prob.weights)
+
+    # Min heap on Eval (the best leaf is the one with the lowest Eval); the counter keeps ties in insertion order
+    heap = [(cursor.root.eval, 0, cursor.root)]
+    counter = 1
+    best = None
+    nodes = updates = maxFrontier = maxDepth = 0 # search statistics, handed to searchStats at the end
 
     # Loop until we cannot generate any more leaves
-    while True:
+    while heap:
+        maxFrontier = max(maxFrontier, len(heap))
         # Run Fleaf to choose the best leaf node
         pr = fleaf(heap)
+        cursor.moveTo(pr)
+        nodes += 1
+        maxDepth = max(maxDepth, pr.depth)
+
+        # A leaf without remaining games/practices is a solution
+        if not cursor.unassigned:
+            if best is None or pr.eval < best.eval:
+                best = pr
+                updates += 1
+            continue
+
         # Run Ftrans to choose a game or practice to schedule
-        match = ftrans()
+        match = ftrans(cursor)
         # Run DIV to create leafs based on ftrans and pr
-        div(pr, match)
+        for leaf in div(cursor, pr, match):
+            heapq.heappush(heap, (leaf.eval, counter, leaf))
+            counter += 1
 
-    return 0
+    cursor.reset()
+    if searchStats.stats:
+        searchStats.stats.record(nodes=nodes, children=counter - 1, incumbentUpdates=updates,
+                                 maxFrontier=maxFrontier, maxDepth=maxDepth)
+    return materialize(prob, best.assignments(), best.eval) if best else None
 
 """
     Generates a list of new leaf nodes based on the given leaf node.
     DIV will only generate VALID leaf nodes. 
     Valid leaf nodes are leaf nodes that satisfy the hard constraints
+    Each new leaf is scored with the delta of its one new assignment, so fleaf can simply pop the heap
+    @param cursor: LeafCursor positioned at pr
     @param pr: Leaf node to generate new leaf nodes from 
-    @param match: Game or practice to schedule
+    @param match: Item id of the game or practice to schedule
     @return: List of new valid schedules (leafs)
 """
-def div(pr, match):
-    # Look through all open slots in leaf and check if that slot is valid or not based on hard constraints
-    # If it is valid, generate a new leaf node with match in that slot, append it to the list of new leaf nodes
-    # Return the list of new leaf nodes
-
-    # IDEA
-        # If max heap is used in fleaf, DIV may need to use SC() to calculate soft constraint values for new leafs and add them to the heap here
-        # fleaf will simply pop the max value from the heap to get the best leaf node; does not call SC() 
-    return 0
+def div(cursor, pr, match):
+    engine, evaluator = cursor.engine, cursor.evaluator
+    return [
+        Leaf(pr, match, slot, pr.eval + evaluator.delta(match, slot))
+        for slot in range(cursor.model.numSlotsFor(match))
+        if engine.check(match, slot)
+    ]
 
 """
-    Chooses the best leaf node from the max heap
-    @param heap: Max heap of leaf nodes
+    Chooses the best leaf node from the heap
+    @param heap: Min heap of (Eval, counter, leaf)
     @return: Chosen best leaf node
 """
 def fleaf(heap):
-    # IDEA
-        # Use max heap to store the leaf node soft constraint values, pop the max value to get the best leaf node
-        # Must calculate soft constraint values for new leafs generated in DIV
-    return 0  
+    return heapq.heappop(heap)[2]
     
 """ 
     Chooses a game or practice to schedule from the list of remaining games/practices 
@@ -56,11 +177,26 @@ def fleaf(heap):
         Highest preference value (Random in case of tied preference values)
         Random game or practice that want to be scheduled as a pair
         Random game or practice 
-    @param rem: list of remaining games/practices to be scheduled 
-    @return game or practice to schedule
+    @param cursor: LeafCursor whose unassigned set holds the remaining games/practices
+    @return item id of the game or practice to schedule
 """
-def ftrans(rem):
-    
-    return 0
-
+def ftrans(cursor):
+    return next(item for item in cursor.order if item in cursor.unassigned)
 
+"""
+    Builds a full schedule on top of the start state
+    @param prob: Initial problem state
+    @param assignments: (item, slot) assignments made by the search (Ex. leaf.assignments())
+    @param eval: Eval of the schedule
+    @return: Problem holding the complete schedule and its Eval
+"""
+def materialize(prob, assignments, eval):
+    model = prob.model
+    sched = Schedule(
+        gameSlots={key: list(items) for key, items in prob.sched.gameSlots.items()},
+        pracSlots={key: list(items) for key, items in prob.sched.pracSlots.items()},
+    )
+    for item, slot in assignments:
+        slots = sched.gameSlots if model.isGame(item) else sched.pracSlots
+        slots[model.slotIdsFor(item)[slot]].append(model.itemIds[item])
+    return Problem(sched=sched, remGames=[], remPracs=[], model=model, eval=eval)
@@ -1,82 +1,257 @@
 # General code structure for AND tree
-# V2 does not use a max heap to store the best leaf nodes in order
-# Soft constraints will only be calculated after the algorithm finds all solutions 
-# Fleaf will choose a leaf with breadth/depth or random selection
-# End result will be the same as V1 but with less computation on calculating leaf values
+# V2 is a branch and bound search
+# Every leaf carries an admissible lower bound on the Eval of its completions (see DeltaEvaluator.lowerBound)
+# The best complete schedule found so far is kept as the incumbent and any leaf whose bound is no better than the
+# incumbent is pruned, so the solution space is never enumerated
+# treeSearch is an iterative depth first search over one shared schedule: every assignment is recorded on an undo
+# trail and backtracking pops the trail, so memory is O(depth) and nothing is copied per node
+# The depth first search keeps a live domain for every remaining game/practice (domains.py): forward checking
+# shrinks the neighbours' domains after each assignment, ftrans picks the smallest domain and a branch is cut as
+# soon as any domain empties
+# Interchangeable games/practices and slots are only tried in one canonical order (symmetry.py), so div and expand
+# never generate branches that are permutations of each other
+# With a Budget the depth first search is an anytime search: it stops when the budget runs out and returns the best
+# schedule found so far, and every improved schedule is reported as soon as it is found
+# Every search hands its node, prune and depth counts to searchStats when it ends (see searchStats.py)
+# bestFirstSearch keeps a heap of persistent leafs instead and always expands the lowest bound first
+import heapq
+import math
+import searchStats
+from structure import LeafCursor, ftrans as orderedFtrans, materialize
+from constants import Leaf
+from domains import Domains
+from searchBudget import Budget
+
+SYNC_INTERVAL = 256 # nodes between two reads of the shared incumbent Eval in a parallel search
+
+"""
+    Main code loop for AND tree search algorithm (depth first branch and bound with an undo trail)
+    @param prob: Initial problem state
+    @param budget: Optional Budget; once it is exhausted the search stops and budget.exhausted is set
+    @param onImprove: Optional function called with (solution, elapsed seconds) for every improved schedule
+    @return: Optimal solution to the problem (with its Eval), None if no schedule satisfies the hard constraints
+             With an exhausted budget: the best solution found so far, None if none was found
+"""
+def treeSearch(prob, budget=None, onImprove=None):
+    budget = budget or Budget()
+    cursor = LeafCursor(prob, prob.weights)
+    domains = searchStats.watch(Domains(cursor.engine, [item for item in cursor.order if item in cursor.unassigned]))
+
+    if not cursor.unassigned:
+        return materialize(prob, [], SC(cursor))
+    if domains.empty():
+        return None
+
+    report = None
+    if onImprove:
+        report = lambda incumbent, incumbentEval: onImprove(materialize(prob, incumbent, incumbentEval), budget.elapsed())
+    incumbent, incumbentEval = depthFirst(cursor, domains, budget=budget, onImprove=report)
+    return materialize(prob, incumbent, incumbentEval) if incumbent else None
+
+"""
+    Depth first branch and bound below the cursor's current assignments
+    The cursor and the domains are left exactly as they were found
+    @param cursor: LeafCursor holding the assignments made so far (at least one item left unassigned)
+    @param domains: Domains matching the cursor's assignments, with no empty domain
+    @param incumbentEval: Only schedules with a lower Eval are searched for
+    @param shared: Optional multiprocessing.Value holding the best Eval found by any process, read every
+                   SYNC_INTERVAL nodes to prune against and lowered whenever this search improves on it
+    @param budget: Optional Budget charged every SYNC_INTERVAL nodes and for every improved schedule, the search
+                   stops once it is exhausted
+    @param onImprove: Optional function called with the (item, slot) assignments and Eval of every improved schedule
+                      (with shared: only of the schedules that improve on every process)
+    @return: ((item, slot) assignments made below the cursor, Eval) of the best schedule, (None, incumbentEval) if
+             no schedule below the cursor beats incumbentEval (or none was found before the budget ran out)
+"""
+def depthFirst(cursor, domains, incumbentEval=math.inf, shared=None, budget=None, onImprove=None):
+    trail = [] # (item, domain trail mark) of every assignment on the current path, in order; backtracking pops it
+    incumbent = None # (item, slot) assignments of the best complete schedule found so far
+    nodes = 0
+    children = prunes = wipeouts = updates = maxDepth = 0 # search statistics, handed to searchStats at the end
+
+    # One frame per depth: [item, candidate slots sorted by bound, their bounds, index of the next candidate]
+    stack = [expand(cursor, domains, domainFtrans(domains))]
+    children += len(stack[0][1])
+    while stack:
+        frame = stack[-1]
+        match, slots, bounds, nextIndex = frame
+
+        nodes += 1
+        if nodes % SYNC_INTERVAL == 0:
+            # Pick up better schedules found by the other processes
+            if shared is not None:
+                incumbentEval = min(incumbentEval, shared.value)
+            # Out of budget: unwind the path and keep the best schedule so far
+            if budget is not None and not budget.spend(SYNC_INTERVAL):
+                while trail:
+                    backtrack(cursor, domains, trail)
+                break
+
+        # Frame exhausted, or every remaining candidate is no better than the incumbent: backtrack
+        if nextIndex == len(slots) or bounds[nextIndex] >= incumbentEval:
+            prunes += len(slots) - nextIndex
+            stack.pop()
+            if trail:
+                backtrack(cursor, domains, trail)
+            continue
+        frame[3] = nextIndex + 1
+
+        slot = slots[nextIndex]
+        trail.append((match, domains.mark()))
+        cursor.assign(match, slot)
+
+        # Forward checking emptied a domain: no completion of this branch satisfies the hard constraints
+        if not domains.assign(match, slot):
+            wipeouts += 1
+            backtrack(cursor, domains, trail)
+        elif not cursor.unassigned:
+            # Complete schedule, its bound is its Eval
+            incumbent = [(item, cursor.engine.assignment[item]) for item, _ in trail]
+            incumbentEval = bounds[nextIndex]
+            updates += 1
+            maxDepth = max(maxDepth, len(trail))
+            if shared is None:
+                if onImprove:
+                    onImprove(incumbent, incumbentEval)
+            else:
+                # Report under the lock so the processes report improvements in order
+                with shared.get_lock():
+                    if incumbentEval < shared.value:
+                        shared.value = incumbentEval
+                        if onImprove:
+                            onImprove(incumbent, incumbentEval)
+            backtrack(cursor, domains, trail)
+            if budget is not None and not budget.found():
+                while trail:
+                    backtrack(cursor, domains, trail)
+                break
+        else:
+            frame = expand(cursor, domains, domainFtrans(domains))
+            children += len(frame[1])
+            stack.append(frame)
+            if len(trail) > maxDepth:
+                maxDepth = len(trail)
+
+    if searchStats.stats:
+        # The DFS frontier is its stack, one frame per assignment on the path and one for the next item
+        searchStats.stats.record(nodes=nodes, children=children, prunes=prunes, wipeouts=wipeouts,
+                                 incumbentUpdates=updates, maxFrontier=maxDepth + 1, maxDepth=maxDepth)
+    return incumbent, incumbentEval
+
+"""
+    Undoes the last assignment on the trail and restores the domains it shrank
+    @param cursor: LeafCursor holding the current path's assignments
+    @param domains: Domains of the search
+    @param trail: (item, domain trail mark) of every assignment on the current path
+"""
+def backtrack(cursor, domains, trail):
+    item, mark = trail.pop()
+    domains.undoTo(mark)
+    cursor.unassign(item)
+
+"""
+    Creates the DFS frame of a game/practice: the valid slots left in its domain, in canonical order for symmetric
+    items and slots, ordered by lower bound
+    @param cursor: LeafCursor holding the current path's assignments
+    @param domains: Domains of the search
+    @param match: Item id of the game or practice to schedule
+    @return: [match, slots, bounds, 0]
+"""
+def expand(cursor, domains, match):
+    evaluator = cursor.evaluator
+    slots = cursor.symmetry.canonical(match, domains.domain[match])
+    children = sorted((evaluator.boundAfter(match, slot), slot) for slot in slots)
+    return [match, [slot for _, slot in children], [bound for bound, _ in children], 0]
+
+"""
+    Choose the game or practice with the fewest legal slots left (fail first), ties broken by the ftrans order:
+        Highest preference value, then games or practices that want to be scheduled as a pair
+    Each item's slot count is kept in a bucket queue, so the choice costs no scan over the remaining items
+    @param domains: Domains of the search
+    @return item id of the game or practice to schedule
+"""
+def domainFtrans(domains):
+    return domains.pick()
 
 """
-    Main code loop for AND tree search algorithm
+    Best-first branch and bound over persistent leafs
     @param prob: Initial problem state
-    @return: Solution to the problem
+    @return: Optimal solution to the problem (with its Eval), None if no schedule satisfies the hard constraints
 """
-def treeSearch(prob):
-    # Initially, prob is a list of the initial problem state
-    leafs = [] # Contains all leaf nodes in the tree
-    solutions = [] # Contains all potential solutions to the problem
+def bestFirstSearch(prob):
+    cursor = LeafCursor(prob, prob.weights)
+    root = cursor.root
+    root.eval = SC(cursor)
+
+    leafs = [(root.eval, 0, 0, root)] # Min heap of (bound, -depth, counter, leaf), deeper leafs first on ties
+    counter = 1
+    incumbent = root if not cursor.unassigned else None # Best complete leaf found so far
+    incumbentEval = root.eval if incumbent else math.inf
+    nodes = children = prunes = updates = maxFrontier = maxDepth = 0 # search statistics, handed to searchStats at the end
 
     # Loop until we cannot generate any more leaves
-    while True:
+    while leafs:
+        maxFrontier = max(maxFrontier, len(leafs))
         # Run Fleaf
         pr = fleaf(leafs)
 
-        # remove pr from leafs
-        leafs.remove(pr)
+        # Every remaining leaf has a bound at least as high, so the incumbent is optimal
+        if pr.eval >= incumbentEval:
+            prunes += len(leafs) + 1
+            break
+        cursor.moveTo(pr)
+        nodes += 1
+        maxDepth = max(maxDepth, pr.depth + 1)
 
         # Run Ftrans to choose a game or practice to schedule
-        match = ftrans(pr)
-
-        # Remove match from remaining 
-        pr[1].remove(match)
+        match = ftrans(cursor)
 
         # Run DIV to create leafs based on ftrans and pr
-        newLeafs = div(pr, match)
-
-        # If no new leafs are generated, pr is a solution
-        # Additionally, we will only consider pr as a "real" solution if there are no remaining games/practices
-        if len(newLeafs) == 0 & len(pr.remaining) == 0:
-            solutions.append(pr)
-        # Add new leafs to leafs
-        leafs += newLeafs
+        for leaf in div(cursor, pr, match):
+            children += 1
+            if leaf.eval >= incumbentEval:
+                prunes += 1
+                continue # Prune: no completion of leaf beats the incumbent
+            if len(cursor.unassigned) == 1:
+                # leaf is a complete schedule, its bound is its Eval
+                incumbent, incumbentEval = leaf, leaf.eval
+                updates += 1
+            else:
+                heapq.heappush(leafs, (leaf.eval, -leaf.depth, counter, leaf))
+                counter += 1
 
-        # If leafs is empty, break out of loop
-        if len(leafs) == 0:
-            break
-
-    # Choose the best leaf from leafs using SC()
-    best = SC(solutions)
-    
-    # Return the best leaf
-    return best
+    cursor.reset()
+    if searchStats.stats:
+        searchStats.stats.record(nodes=nodes, children=children, prunes=prunes, incumbentUpdates=updates,
+                                 maxFrontier=maxFrontier, maxDepth=maxDepth)
+    return materialize(prob, incumbent.assignments(), incumbent.eval) if incumbent else None
 
 """
     Generates a list of new leaf nodes based on the given leaf node
     DIV will only generate VALID leaf nodes
     Valid leaf nodes are leaf nodes that satisfy the hard constraints
+    Of interchangeable items and slots only the canonical order is generated (see symmetry.py)
+    Each new leaf carries the lower bound of its completions
+    @param cursor: LeafCursor positioned at pr
     @param pr: Leaf node to generate new leaf nodes from
-    @param match: Game or practice to schedule
+    @param match: Item id of the game or practice to schedule
     @return: List of new valid schedules (leafs)
 """
-def div(pr, match):
-    newLeafs = [] # Contains all new leafs that DIV generates
-
-    # Look through all open slots in the leaf and check if it is valid or not based on hard constraints HC()
-    # If it is valid, generate a new leaf node with match in that slot
-    # Append the new leaf to newLeafs
-
-    # Return the list of new leaf nodes
-    return newLeafs
+def div(cursor, pr, match):
+    engine, evaluator = cursor.engine, cursor.evaluator
+    return [
+        Leaf(pr, match, slot, evaluator.boundAfter(match, slot))
+        for slot in cursor.symmetry.canonical(match, range(cursor.model.numSlotsFor(match)))
+        if HC(engine, slot, match)
+    ]
 
 """ 
-    Choose a leaf node from the list of leaf nodes
-    @param leafs: list of leaf nodes
-    @return: Chosen leaf node
+    Choose a leaf node from the heap of leaf nodes
+    @param leafs: Min heap of (bound, -depth, counter, leaf)
+    @return: Leaf with the lowest bound
 """
 def fleaf(leafs):
-    # In V2, we are not choosing a leaf based on soft constraints
-    # Decision can be made via breadth/depth/random or whatever we come up with
-
-    # Return a leaf node
-    return leaf
+    return heapq.heappop(leafs)[3]
 
 """
     Choose a game or practice to schedule from the list of remaining games/practices
@@ -84,58 +259,31 @@ def fleaf(leafs):
         Highest preference value (Random between tied preference values)
         Random game or practice that want to be scheduled as a pair
         Random game or practice
-    @param pr: pr from fleaf. 
-    @return game or practice to schedule
+    @param cursor: LeafCursor positioned at pr from fleaf
+    @return item id of the game or practice to schedule
 """
-def ftrans(pr):
-    remaining = pr.remaining
-
-    # Choose a game or practice from preferences
-    # If none, choose a game or practice from pairs
-    # If none, choose a random game or practice
-    return match
+def ftrans(cursor):
+    return orderedFtrans(cursor)
 
 """
     Calculate hard constraints for a given slot
-    @param slot: Slot to check
-    @param match: Game/practice to schedule
+    @param engine: HardConstraintEngine holding the leaf's assignments
+    @param slot: Slot id to check
+    @param match: Item id of the game/practice to schedule
     @return: True if slot is valid, False otherwise
 """
-def HC(slot, match):
-    # Check if slot is valid based on hard constraints
-    return True
-
-"""
-    Calculate soft constraints for all solutions
-    @param solutions: List of solutions
-    @return: Best solution 
-"""
-def SC(solutions):
-    # Calculate soft constraints for all solutions
-    
-    # Loop through all solutions and calculate the soft constraints 
-        # gpmin 
-            # for each slot, the number of games/practices scheduled should be greater than or equal to the minimum 
-        # pref
-            # look at each game/practice from preferences and see if it is scheduled in that time
-        # atgame 
-            # Different divisional games within a single age/tier group should be scheduled at different times
-
-
-    # Return the best solution
-    return 0
+def HC(engine, slot, match):
+    # Check if slot is valid based on hard constraints, O(1) against the engine's occupancy and conflict sets
+    return engine.check(match, slot)
 
 """
-    Creates the initial problem state after parsing the input
-    start() will also fulfill any partial assignments 
-    @return: Initial problem state
+    Calculate soft constraints for a leaf
+        gpmin: slots below their game/practice minimum, less what the remaining games/practices could still fill
+        pref: preferences of the assigned items that are not met, plus the smallest penalty of every remaining item
+        pair: pairs that are not scheduled together
+        secdiff: different divisions of a single age/tier group scheduled at the same time
+    @param cursor: LeafCursor positioned at the leaf
+    @return: Admissible lower bound on the Eval of the leaf's completions (its Eval once it is complete)
 """
-def start():
-    # Parse the input
-    
-    # Initialize the problem state
-
-    # Fulfill partial assignment
-
-    # Return the initial problem state
-    return 0
+def SC(cursor):
+    return cursor.evaluator.lowerBound()
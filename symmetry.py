@@ -0,0 +1,164 @@
+import math
+
+"""
+    Symmetry breaking for the tree search
+    Two games/practices are interchangeable when every constraint treats them the same: same kind, same unwanted
+    slots, same preferences, same age/tier and division, no partial assignment and the same not compatible and pair
+    partners. Two slots of one kind are interchangeable when they have the same max/min, every item has the same
+    preference for and unwanted mark on both, they overlap the same slots of the other kind and neither is used by a
+    partial assignment or the start state. Swapping interchangeable items or slots in a schedule gives a schedule
+    that satisfies the same hard constraints with the same Eval, so the search only has to visit one of them:
+        Items of a class (c1, c2, ..., ck) are kept in slot order, slot(c1) <= slot(c2) <= ... <= slot(ck)
+        Of the still empty slots of a slot class only the lowest one is tried, as long as doing so cannot clash with
+        the item order (no item class is partly assigned and the item is the first of its class)
+"""
+
+class Symmetry:
+    """
+    Item and slot equivalence classes of a problem and the canonical ordering the search keeps
+
+    Attributes:
+        model (CompiledProblem): the problem being scheduled
+        engine (HardConstraintEngine): engine holding the current assignments
+        itemClasses (list[tuple[int]]): every class of two or more interchangeable items, members in canonical order
+        itemClass (list[int]): class index of every item, -1 for items without an interchangeable partner
+        position (list[int]): position of every item in its class
+        assignedCount (list[int]): number of assigned members of every item class
+        partlyAssigned (int): number of item classes with some but not all members assigned
+        gameSlotClass, pracSlotClass (list[int]): class index of every slot, -1 for slots without an interchangeable one
+    """
+    def __init__(self, model, engine):
+        """
+        Parameters:
+            model (CompiledProblem): the problem being scheduled
+            engine (HardConstraintEngine): engine holding the start state's assignments
+        """
+        self.model = model
+        self.engine = engine
+        self.itemClasses = itemClasses(model, engine)
+        self.itemClass = [-1] * model.numItems
+        self.position = [0] * model.numItems
+        for index, members in enumerate(self.itemClasses):
+            for position, item in enumerate(members):
+                self.itemClass[item] = index
+                self.position[item] = position
+        self.assignedCount = [0] * len(self.itemClasses)
+        self.partlyAssigned = 0
+        self.gameSlotClass = slotClasses(model, engine, True)
+        self.pracSlotClass = slotClasses(model, engine, False)
+
+    def __repr__(self):
+        slotClasses = len(set(self.gameSlotClass) - {-1}) + len(set(self.pracSlotClass) - {-1})
+        return f"Symmetry(itemClasses={len(self.itemClasses)}, slotClasses={slotClasses})"
+
+    def assign(self, item):
+        """Records that item was assigned, O(1)"""
+        index = self.itemClass[item]
+        if index >= 0:
+            size = len(self.itemClasses[index])
+            count = self.assignedCount[index]
+            self.partlyAssigned += (count + 1 < size) - (0 < count < size)
+            self.assignedCount[index] = count + 1
+
+    def unassign(self, item):
+        """Records that item was unassigned, O(1)"""
+        index = self.itemClass[item]
+        if index >= 0:
+            size = len(self.itemClasses[index])
+            count = self.assignedCount[index]
+            self.partlyAssigned += (0 < count - 1) - (count < size)
+            self.assignedCount[index] = count - 1
+
+    def canonical(self, item, slots):
+        """
+        Returns the slots of an iterable of candidate slots the search still has to try for item
+
+        Parameters:
+            item (int): item id of the game/practice to place
+            slots (iterable): candidate slot ids (of the item's kind)
+        """
+        assignment = self.engine.assignment
+        index = self.itemClass[item]
+
+        # Keep the item between the slots of its assigned class members
+        if index >= 0:
+            low, high = 0, math.inf
+            position = self.position[item]
+            for k, other in enumerate(self.itemClasses[index]):
+                slot = assignment[other]
+                if slot >= 0:
+                    if k < position:
+                        low = max(low, slot)
+                    elif k > position:
+                        high = min(high, slot)
+            slots = [slot for slot in slots if low <= slot <= high]
+
+        # Of the empty slots of a slot class only try the lowest
+        if self.partlyAssigned or (index >= 0 and (self.position[item] or self.assignedCount[index])):
+            return slots
+        slotClass = self.gameSlotClass if item < self.model.numGames else self.pracSlotClass
+        counts = self.engine.countsFor(item)
+        tried, kept = set(), []
+        for slot in sorted(slots):
+            cls = slotClass[slot]
+            if cls >= 0 and counts[slot] == 0:
+                if cls in tried:
+                    continue
+                tried.add(cls)
+            kept.append(slot)
+        return kept
+
+def itemClasses(model, engine):
+    """
+    Returns the classes of two or more interchangeable items that are not assigned in the start state
+
+    Items that share every constraint and are not compatible with the same items (but not with each other) form a
+    class; items that share every constraint and are all not compatible with each other form a class as well
+    """
+    def base(item):
+        return (item < model.numGames, bytes(model.unwanted[item]), tuple(model.pref[item]),
+                model.ageTier[item], model.division[item], tuple(model.pairsOf[item]))
+
+    candidates = [item for item in range(model.numItems) if model.partial[item] < 0 and not engine.isAssigned(item)]
+    groups = {}
+    for item in candidates:
+        groups.setdefault((base(item), tuple(model.incompat[item])), []).append(item)
+    classes = [members for members in groups.values() if len(members) > 1]
+
+    # Items left alone: group them with the items they are all not compatible with
+    alone = [members[0] for members in groups.values() if len(members) == 1]
+    groups = {}
+    for item in alone:
+        closed = tuple(sorted(tuple(model.incompat[item]) + (item,)))
+        groups.setdefault((base(item), closed), []).append(item)
+    classes += [members for members in groups.values() if len(members) > 1]
+    return [tuple(sorted(members)) for members in classes]
+
+def slotClasses(model, engine, games):
+    """
+    Returns the class index of every slot of one kind, -1 for slots without an interchangeable slot
+
+    Parameters:
+        model (CompiledProblem): the problem being scheduled
+        engine (HardConstraintEngine): engine holding the start state's assignments
+        games (bool): True for the game slots, False for the practice slots
+    """
+    items = range(model.numGames) if games else range(model.numGames, model.numItems)
+    slotMax, slotMin = (model.gameMax, model.gameMin) if games else (model.pracMax, model.pracMin)
+    overlaps = model.gameOverlaps if games else model.pracOverlaps
+    counts = engine.gameCount if games else engine.pracCount
+    used = {model.partial[item] for item in items}
+
+    groups = {}
+    for slot in range(len(slotMax)):
+        if slot in used or counts[slot]:
+            continue
+        key = (slotMax[slot], slotMin[slot], tuple(overlaps[slot]),
+               tuple(model.pref[item][slot] for item in items), bytes(model.unwanted[item][slot] for item in items))
+        groups.setdefault(key, []).append(slot)
+
+    slotClass = [-1] * len(slotMax)
+    for index, slots in enumerate(members for members in groups.values() if len(members) > 1):
+        for slot in slots:
+            slotClass[slot] = index
+    return slotClass
@@ -0,0 +1,42 @@
+import random
+import pytest
+from compiledProblem import compileProblem
+from instanceGenerator import generate
+from parserFile import parseFile
+from softConstraints import DeltaEvaluator, Weights, evalAssignment
+
+"""
+    Checks DeltaEvaluator against a full recomputation of Eval (softConstraints.evalAssignment)
+    Random assign/unassign steps on generated inputs; after every step the running Eval must equal the recomputed
+    one, and delta must have predicted the Eval of every assignment before it was made
+"""
+
+STEPS = 2000 # random assign/unassign steps per input
+
+def compiledInput(tmp_path, seed):
+    """Returns the CompiledProblem of a small generated input with preferences, pairs and several divisions per age/tier"""
+    path = tmp_path / f"generated{seed}.txt"
+    path.write_text(generate(games=120, practices=40, gameSlots=5, practiceSlots=6, incompatDensity=0.0,
+                             pairDensity=0.01, seed=seed, preferenceRate=2.0))
+    return compileProblem(parseFile(str(path)))
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("weights", [Weights(), Weights(2, 3, 5, 7, 11, 13, 17, 19)])
+def test_delta_matches_full_recomputation(tmp_path, seed, weights):
+    model = compiledInput(tmp_path, seed)
+    evaluator = DeltaEvaluator(model, weights)
+    rand = random.Random(seed)
+    assert evaluator.value == evalAssignment(model, weights, evaluator.assignment)
+
+    for _ in range(STEPS):
+        item = rand.randrange(model.numItems)
+        if evaluator.assignment[item] >= 0 and rand.random() < 0.5:
+            evaluator.unassign(item)
+        else:
+            if evaluator.assignment[item] >= 0:
+                evaluator.unassign(item)
+            slot = rand.randrange(model.numSlotsFor(item))
+            expected = evaluator.value + evaluator.delta(item, slot)
+            evaluator.assign(item, slot)
+            assert evaluator.value == expected
+        assert evaluator.value == evalAssignment(model, weights, evaluator.assignment)
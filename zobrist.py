@@ -0,0 +1,75 @@
+import random
+from array import array
+from collections import OrderedDict
+
+"""
+    Zobrist hashing of schedules and a bounded table of recently seen schedule hashes
+    Every (item, slot) assignment gets a random 64-bit key; the hash of a schedule is the xor of the keys of its
+    assignments, so assigning or unassigning an item updates the hash with a single xor and two schedules with the
+    same assignments have the same hash no matter in which order they were made.
+    The local search keeps the hashes of the schedules it visited last in a TranspositionTable (its tabu memory).
+"""
+
+DEFAULT_CAPACITY = 1 << 16
+
+class ZobristKeys:
+    """
+    Attributes:
+        keys (list[array]): 64-bit key of every (item, slot), keys[item][slot]
+    """
+    def __init__(self, model, seed=0):
+        """
+        Parameters:
+            model (CompiledProblem): the problem being scheduled
+            seed (int): seed of the random keys
+        """
+        rand = random.Random(seed)
+        self.keys = []
+        for item in range(model.numItems):
+            row = array('Q')
+            row.frombytes(rand.randbytes(8 * model.numSlotsFor(item)))
+            self.keys.append(row)
+
+    def hashOf(self, assignment):
+        """Returns the hash of a full assignment (slot of every item, -1 for unassigned items)"""
+        value = 0
+        for item, slot in enumerate(assignment):
+            if slot >= 0:
+                value ^= self.keys[item][slot]
+        return value
+
+class TranspositionTable:
+    """
+    Bounded hash -> Eval map of the most recently stored schedules, the least recently stored entry is evicted when
+    it is full
+
+    Attributes:
+        capacity (int): maximum number of entries
+        entries (OrderedDict): hash -> Eval of the schedule, least recently stored first
+    """
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __repr__(self):
+        return f"TranspositionTable(size={len(self.entries)}, capacity={self.capacity})"
+
+    def store(self, key, value):
+        """
+        Records a schedule as the most recently stored one
+
+        Parameters:
+            key (int): Zobrist hash of the schedule
+            value (int): Eval of the schedule
+        """
+        if key in self.entries:
+            self.entries.move_to_end(key)
+        elif len(self.entries) >= self.capacity:
+            self.entries.popitem(last=False)
+        self.entries[key] = value